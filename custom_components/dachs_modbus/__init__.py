@@ -1,51 +1,164 @@
 """The Senertec Dachs Modbus integration."""
 
 from datetime import timedelta
+from functools import partial
 import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
 from .coordinator import DachsModbusDataUpdateCoordinator
 from .api import DachsModbusApiClient
-from .const import DOMAIN, CONF_GLT_PIN
+from .connection import async_get_connection, async_release_connection
+from .fleet import async_get_fleet
+from .services import async_setup_services
+from .const import (
+    DOMAIN,
+    CONF_GLT_PIN,
+    CONF_COUNTER_INTERVAL,
+    CONF_FLEET_CONCURRENCY,
+    CONF_READ_SPAN_MAX_GAP,
+    CONF_RETRIES,
+    CONF_SAMPLE_INTERVAL,
+    CONF_TIMEOUT,
+    CONF_UNIT_ID,
+    DEFAULT_COUNTER_INTERVAL,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    DEFAULT_UNIT_ID,
+    READ_SPAN_MAX_GAP,
+    STORAGE_VERSION,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the services of the integration."""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Senertec Dachs from a config entry."""
     hass.data.setdefault(DOMAIN, {})
 
+    unit_id = entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
+    connection = async_get_connection(
+        hass, entry.data[CONF_HOST], entry.data[CONF_PORT], unit_id
+    )
     client = DachsModbusApiClient(
         host=entry.data[CONF_HOST],
         port=entry.data[CONF_PORT],
         glt_pin=entry.data[CONF_GLT_PIN],
+        unit_id=unit_id,
+        connection=connection,
+        max_gap=_option(entry, CONF_READ_SPAN_MAX_GAP),
     )
 
+    # All entries poll through one scheduler that spreads their polls over
+    # the interval and bounds how many run at once; the lowest limit of the
+    # entries that set one applies.
+    fleet = async_get_fleet(hass)
     coordinator = DachsModbusDataUpdateCoordinator(
         hass,
         client=client,
-        update_interval=entry.data[CONF_SCAN_INTERVAL],
+        update_interval=_option(entry, CONF_SCAN_INTERVAL),
+        counter_interval=_option(entry, CONF_COUNTER_INTERVAL),
+        store=Store(hass, STORAGE_VERSION, _storage_key(entry)),
+        fleet=fleet,
     )
+    fleet.async_join(coordinator, entry.options.get(CONF_FLEET_CONCURRENCY))
+    connection.configure(_option(entry, CONF_TIMEOUT), _option(entry, CONF_RETRIES))
 
-    await coordinator.async_config_entry_first_refresh()
+    try:
+        # With values from the last run the entities start from those, and
+        # the first poll runs once setup is done; the device may still be
+        # booting.
+        restored = await coordinator.async_restore()
+        await coordinator.async_setup_capabilities(entry)
+        if not restored:
+            await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        fleet.async_leave(coordinator)
+        client.close()
+        async_release_connection(hass, connection, unit_id)
+        raise
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    entry.async_on_unload(coordinator.async_start_heartbeat())
+    entry.async_on_unload(entry.add_update_listener(_async_update_options))
+    coordinator.async_set_sample_interval(_option(entry, CONF_SAMPLE_INTERVAL))
+    entry.async_on_unload(partial(coordinator.async_set_sample_interval, None))
 
     await hass.config_entries.async_forward_entry_setups(
         entry, ["sensor", "number", "switch"]
     )
+    if restored:
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} first refresh"
+        )
 
     return True
 
 
+async def _async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options to the running entry instead of reloading it."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_get_fleet(hass).set_limit(
+        coordinator, entry.options.get(CONF_FLEET_CONCURRENCY)
+    )
+    coordinator.async_apply_options(
+        scan_interval=_option(entry, CONF_SCAN_INTERVAL),
+        counter_interval=_option(entry, CONF_COUNTER_INTERVAL),
+        timeout=_option(entry, CONF_TIMEOUT),
+        retries=_option(entry, CONF_RETRIES),
+        max_gap=_option(entry, CONF_READ_SPAN_MAX_GAP),
+    )
+    coordinator.async_set_sample_interval(_option(entry, CONF_SAMPLE_INTERVAL))
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(
         entry, ["sensor", "number", "switch"]
     )
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        async_get_fleet(hass).async_leave(coordinator)
+        coordinator.api.close()
+        async_release_connection(
+            hass,
+            coordinator.api.connection,
+            entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
+        )
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored values of a removed config entry."""
+    await Store(hass, STORAGE_VERSION, _storage_key(entry)).async_remove()
+
+
+_OPTION_DEFAULTS = {
+    CONF_COUNTER_INTERVAL: DEFAULT_COUNTER_INTERVAL,
+    CONF_TIMEOUT: DEFAULT_TIMEOUT,
+    CONF_RETRIES: DEFAULT_RETRIES,
+    CONF_READ_SPAN_MAX_GAP: READ_SPAN_MAX_GAP,
+}
+
+
+def _option(entry: ConfigEntry, key: str):
+    """Return an option, falling back to the data the entry was created with."""
+    return entry.options.get(key, entry.data.get(key, _OPTION_DEFAULTS.get(key)))
+
+
+def _storage_key(entry: ConfigEntry) -> str:
+    """Return the storage key of the last values of an entry."""
+    return f"{DOMAIN}.{entry.entry_id}"
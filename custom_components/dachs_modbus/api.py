@@ -1,153 +1,346 @@
 """API for Senertec Dachs Modbus."""
 
 import logging
-import threading
-from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ConnectionException
-from pymodbus.payload import BinaryPayloadDecoder
-from pymodbus.constants import Endian
+import time
 
+from pymodbus.exceptions import (
+    ConnectionException,
+    ModbusException,
+    ModbusIOException,
+)
+
+from .breaker import DachsCircuitBreaker
+from .connection import DachsModbusConnection
 from .const import (
-    GLT_INTERFACE_VERSION,
-    DEVICE_TYPE,
-    UNIT_STATUS,
-    ELECTRICAL_POWER,
-    TYPE_OF_REQUEST,
-    RUNTIME_SINCE_LAST_START,
-    LAST_SHUTDOWN_REASON,
-    HEATING_WATER_PUMP_STATUS,
-    CHP_OUTLET_TEMPERATURE,
-    CHP_INLET_TEMPERATURE,
-    TOTAL_OPERATING_HOURS,
-    TOTAL_STARTS,
-    GENERATED_ELECTRICAL_ENERGY,
-    GENERATED_THERMAL_ENERGY,
-    OUTSIDE_TEMPERATURE,
-    BUFFER_TEMPERATURE_T1,
-    BUFFER_TEMPERATURE_T2,
-    BUFFER_TEMPERATURE_T3,
-    BUFFER_TEMPERATURE_T4,
-    CONTROL_STRATEGY,
-    MINIMUM_RUNTIME,
-    MAX_INLET_TEMPERATURE,
-    POWER_MODULATION,
-    ACTIVE_GLT_CONNECTIONS,
-    SET_ELECTRICAL_POWER,
-    BLOCK_CHP_VIA_GLT,
+    BLOCK_CHP_REGISTER,
+    DEFAULT_UNIT_ID,
+    GLT_PIN_REGISTER,
+    HOLDING_REGISTER_START,
+    INPUT_REGISTER_START,
+    INPUT_REGISTERS,
+    READ_SPAN_MAX_GAP,
+    REGISTER_CACHE_TTL,
+    REGISTER_TYPE_HOLDING,
+    REGISTER_TYPE_INPUT,
+)
+from .decoder import (
+    HOLDING_REGISTER_DECODER,
+    INPUT_REGISTER_DECODER,
+    SAMPLE_READ_PLAN,
+    TIER_READ_PLANS,
+    RegisterDecoder,
+    build_read_plan,
+    build_tier_plans,
 )
+from .telemetry import DachsModbusTelemetry
 
 _LOGGER = logging.getLogger(__name__)
 
+_INPUT_REGISTERS_BY_KEY = {register.key: register for register in INPUT_REGISTERS}
+
 
 class DachsModbusApiClient:
     """API client for Senertec Dachs Modbus."""
 
-    def __init__(self, host: str, port: int, glt_pin: str):
-        """Initialize the API client."""
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        glt_pin: str,
+        unit_id: int = DEFAULT_UNIT_ID,
+        connection: DachsModbusConnection | None = None,
+        max_gap: int = READ_SPAN_MAX_GAP,
+    ):
+        """Initialize the API client.
+
+        Pass a shared connection to reach a unit behind a gateway that
+        other clients use as well; otherwise the client opens its own.
+        Requests go through a circuit breaker of this unit, so a unit that
+        stopped answering does not hold up the shared session.
+        """
         self._host = host
         self._port = port
         self._glt_pin = glt_pin
-        self._client = ModbusTcpClient(host, port=port)
-        self._lock = threading.Lock()
-        self._heartbeat_timer = None
-        self._power_setpoint = 0
+        self._unit_id = unit_id
+        self._owns_connection = connection is None
+        self.connection = connection or DachsModbusConnection(host, port, unit_id)
+        self._lock = self.connection.lock
+        self._telemetry = DachsModbusTelemetry()
+        self._breaker = DachsCircuitBreaker(f"Dachs at {host}:{port} unit {unit_id}")
+        self._max_gap = max_gap
+        # Input register keys the unit answers, None until probed.
+        self.supported_keys: frozenset[str] | None = None
+        self._read_keys: frozenset[str] | None = None
+        self._read_plans = (
+            TIER_READ_PLANS
+            if max_gap == READ_SPAN_MAX_GAP
+            else build_tier_plans(max_gap=max_gap)
+        )
+        # Last setpoint written by this client and when (time.monotonic) it
+        # was last sent, for the setpoint heartbeat of the coordinator.
+        self.power_setpoint: int | None = None
+        self.setpoint_written_at: float | None = None
+        # Raw registers of recent reads by register type and start address,
+        # with the time (time.perf_counter) they were received.
+        self._raw: dict[str, dict[int, tuple[float, list[int]]]] = {
+            REGISTER_TYPE_INPUT: {},
+            REGISTER_TYPE_HOLDING: {},
+        }
 
-    def __enter__(self):
+    async def __aenter__(self):
         """Connect to the Modbus device."""
-        self._client.connect()
+        async with self._lock:
+            await self.connection.ensure_connected()
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Disconnect from the Modbus device."""
-        if self._heartbeat_timer:
-            self._heartbeat_timer.cancel()
-        self._client.close()
+        self.close()
 
-    def get_data(self) -> dict[str, any]:
+    @property
+    def telemetry(self) -> DachsModbusTelemetry:
+        """Return the poll statistics of this device."""
+        return self._telemetry
+
+    @property
+    def breaker(self) -> DachsCircuitBreaker:
+        """Return the circuit breaker of this device."""
+        return self._breaker
+
+    def close(self):
+        """Close the connection unless it is shared."""
+        if self._owns_connection:
+            self.connection.close()
+
+    async def get_data(self) -> dict[str, any]:
         """Get data from the Modbus device."""
-        with self._lock:
+        # Read all registers in one go
+        return await self._read_plan((INPUT_REGISTER_DECODER,))
+
+    async def get_tier_data(self, tier: str) -> dict[str, any]:
+        """Get the values of one polling tier from the Modbus device."""
+        return await self._read_plan(self._read_plans[tier])
+
+    def set_read_keys(self, keys: frozenset[str] | None) -> None:
+        """Limit tier reads to the registers of keys; None reads all."""
+        self._read_keys = keys
+        if self.supported_keys is not None:
+            keys = self.supported_keys if keys is None else keys & self.supported_keys
+        self._read_plans = build_tier_plans(keys, self._max_gap)
+
+    def set_max_gap(self, max_gap: int) -> None:
+        """Change the longest gap of registers read along between spans."""
+        if max_gap != self._max_gap:
+            self._max_gap = max_gap
+            self.set_read_keys(self._read_keys)
+
+    def set_supported_keys(self, keys: frozenset[str] | None) -> None:
+        """Never read registers outside keys; None assumes all are supported."""
+        self.supported_keys = keys
+        self.set_read_keys(self._read_keys)
+
+    async def probe_input_ranges(self) -> list[tuple[int, int]]:
+        """Return the input register ranges (offset, count) the unit answers.
+
+        Each contiguous run of defined registers is read once. A run the unit
+        rejects is split in halves until the unsupported registers are
+        isolated.
+        """
+        supported = []
+        self._breaker.before_request(probe=True)
+        async with self._lock:
             try:
+                await self.connection.ensure_connected()
+                pending = list(build_read_plan(INPUT_REGISTERS, max_gap=0))
+                while pending:
+                    decoder = pending.pop()
+                    result = await self.connection.read_input_registers(
+                        INPUT_REGISTER_START + decoder.start,
+                        decoder.count,
+                        self._unit_id,
+                    )
+                    if not result.isError():
+                        supported.append((decoder.start, decoder.count))
+                    elif len(decoder.keys) > 1:
+                        registers = [_INPUT_REGISTERS_BY_KEY[k] for k in decoder.keys]
+                        half = len(registers) // 2
+                        pending.extend(build_read_plan(registers[:half], max_gap=0))
+                        pending.extend(build_read_plan(registers[half:], max_gap=0))
+                self._answered()
+            except (ConnectionException, ModbusIOException) as e:
+                self._failed(e)
+                raise
+        return sorted(supported)
+
+    async def get_sample_data(self) -> dict[str, any]:
+        """Get the sampled values without counting them as poll time."""
+        return await self._read_plan(SAMPLE_READ_PLAN, record=False)
+
+    async def _read_plan(
+        self, plan: tuple[RegisterDecoder, ...], record: bool = True
+    ) -> dict[str, any]:
+        """Read and decode the spans of a read plan."""
+        self._breaker.before_request(probe=True)
+        requested = time.perf_counter()
+        async with self._lock:
+            lock_wait = time.perf_counter() - requested
+            round_trip = decode_time = 0.0
+            try:
+                await self.connection.ensure_connected()
                 data = {}
-                # Read all registers in one go
-                result = self._client.read_input_registers(address=8000, count=84)
-                if result.isError():
-                    raise ConnectionException(f"Failed to read registers: {result}")
+                raw = self._raw[REGISTER_TYPE_INPUT]
+                for decoder in plan:
+                    sent = time.perf_counter()
+                    result = await self.connection.read_input_registers(
+                        INPUT_REGISTER_START + decoder.start,
+                        decoder.count,
+                        self._unit_id,
+                    )
+                    received = time.perf_counter()
+                    round_trip += received - sent
+                    if result.isError():
+                        raise ModbusException(f"Failed to read registers: {result}")
+                    raw[INPUT_REGISTER_START + decoder.start] = (
+                        received,
+                        result.registers,
+                    )
+                    data.update(decoder.decode_registers(result.registers))
+                    decode_time += time.perf_counter() - received
+                self._answered()
+                return data
+            except (ConnectionException, ModbusIOException) as e:
+                self._failed(e)
+                raise
+            finally:
+                if record:
+                    self._telemetry.record_request(lock_wait, round_trip, decode_time)
 
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    result.registers, byteorder=Endian.Big
+    async def get_control_data(self) -> dict[str, any]:
+        """Read back the control holding registers."""
+        self._breaker.before_request(probe=True)
+        async with self._lock:
+            try:
+                await self.connection.ensure_connected()
+                result = await self.connection.read_holding_registers(
+                    HOLDING_REGISTER_START,
+                    HOLDING_REGISTER_DECODER.count,
+                    self._unit_id,
                 )
-
-                data[GLT_INTERFACE_VERSION] = decoder.decode_16bit_uint()
-                data[DEVICE_TYPE] = decoder.decode_16bit_uint()
-                data[SERIAL_NUMBER] = (
-                    decoder.decode_string(20).rstrip(b"\x00").decode("utf-8")
+                if result.isError():
+                    raise ModbusException(f"Failed to read registers: {result}")
+                self._answered()
+                self._raw[REGISTER_TYPE_HOLDING][HOLDING_REGISTER_START] = (
+                    time.perf_counter(),
+                    result.registers,
                 )
-                data[NOMINAL_POWER] = decoder.decode_16bit_uint()
-                data[UNIT_STATUS] = decoder.decode_16bit_uint()
-                data[ELECTRICAL_POWER] = decoder.decode_16bit_int() / 10
-                data[TYPE_OF_REQUEST] = decoder.decode_16bit_int()
-                data[RUNTIME_SINCE_LAST_START] = decoder.decode_8bit_uint() / 10
-                data[LAST_SHUTDOWN_REASON] = decoder.decode_16bit_uint()
-                data[HEATING_WATER_PUMP_STATUS] = decoder.decode_16bit_uint()
-                data[CHP_OUTLET_TEMPERATURE] = decoder.decode_16bit_uint() / 10
-                data[CHP_INLET_TEMPERATURE] = decoder.decode_16bit_uint() / 10
-                data[CONTROL_STRATEGY] = decoder.decode_16bit_uint()
-                data[MINIMUM_RUNTIME] = decoder.decode_8bit_uint()
-                data[MAX_INLET_TEMPERATURE] = decoder.decode_16bit_int() / 10
-                data[POWER_MODULATION] = decoder.decode_16bit_uint()
-                data[POWER_LEVEL] = decoder.decode_8bit_uint()
-                data[MODULE_TYPE_DEFINITION] = decoder.decode_16bit_uint()
-                data[TOTAL_OPERATING_HOURS] = decoder.decode_32bit_uint()
-                data[TOTAL_STARTS] = decoder.decode_32bit_uint()
-                data[GENERATED_ELECTRICAL_ENERGY] = decoder.decode_32bit_uint() / 10
-                data[GENERATED_THERMAL_ENERGY] = decoder.decode_32bit_uint() / 10
-                data[OPERATING_HOURS_POWER_LEVEL_1] = decoder.decode_32bit_uint()
-                data[OPERATING_HOURS_POWER_LEVEL_2] = decoder.decode_32bit_uint()
-                data[OPERATING_HOURS_POWER_LEVEL_3] = decoder.decode_32bit_uint()
-                data[OUTSIDE_TEMPERATURE] = decoder.decode_16bit_int() / 10
-                data[BUFFER_TEMPERATURE_T1] = decoder.decode_16bit_int() / 10
-                data[BUFFER_TEMPERATURE_T2] = decoder.decode_16bit_int() / 10
-                data[BUFFER_TEMPERATURE_T3] = decoder.decode_16bit_int() / 10
-                data[BUFFER_TEMPERATURE_T4] = decoder.decode_16bit_int() / 10
-                decoder.skip_bytes(20)  # Skip to 8056
-                data[CURRENT_DISCHARGE_POWER] = decoder.decode_16bit_uint()
+                return HOLDING_REGISTER_DECODER.decode_registers(result.registers)
+            except (ConnectionException, ModbusIOException) as e:
+                self._failed(e)
+                raise
 
-                return data
-            except ConnectionException as e:
-                _LOGGER.error("Failed to connect to Modbus device: %s", e)
+    async def read_registers(
+        self, register_type: str, address: int, count: int
+    ) -> list[int]:
+        """Return raw input or holding registers.
+
+        Reads of the last REGISTER_CACHE_TTL seconds that cover the range
+        answer it, so a request during a poll waits for the poll and shares
+        its registers instead of sending a request of its own.
+        """
+        if (registers := self._cached(register_type, address, count)) is not None:
+            return registers
+        self._breaker.before_request(probe=True)
+        async with self._lock:
+            # The read that held the lock may have covered the range.
+            if (registers := self._cached(register_type, address, count)) is not None:
+                return registers
+            if register_type == REGISTER_TYPE_INPUT:
+                read = self.connection.read_input_registers
+            else:
+                read = self.connection.read_holding_registers
+            try:
+                await self.connection.ensure_connected()
+                result = await read(address, count, self._unit_id)
+                if result.isError():
+                    raise ModbusException(f"Failed to read registers: {result}")
+                self._answered()
+            except (ConnectionException, ModbusIOException) as e:
+                self._failed(e)
                 raise
+            now = time.perf_counter()
+            raw = self._raw[register_type]
+            for start in [
+                s for s, (at, _) in raw.items() if now - at > REGISTER_CACHE_TTL
+            ]:
+                del raw[start]
+            raw[address] = (now, result.registers)
+        return list(result.registers[:count])
 
-    def _send_pin(self):
-        """Send the GLT PIN to the device."""
-        try:
-            self._client.write_register(address=8300, value=int(self._glt_pin))
-        except ConnectionException as e:
-            _LOGGER.error("Failed to send GLT PIN: %s", e)
-            raise
+    def _cached(self, register_type: str, address: int, count: int) -> list[int] | None:
+        """Return the registers of a recent read covering the range, if any."""
+        now = time.perf_counter()
+        for start, (read_at, registers) in self._raw[register_type].items():
+            if (
+                now - read_at <= REGISTER_CACHE_TTL
+                and start <= address
+                and address + count <= start + len(registers)
+            ):
+                return registers[address - start : address - start + count]
+        return None
 
-    def set_electrical_power(self, power: int):
+    async def set_electrical_power(self, power: int):
         """Set the electrical power setpoint."""
-        with self._lock:
-            self._send_pin()
-            self._power_setpoint = power
-            self._client.write_register(address=8301, value=power)
-            self._start_heartbeat()
+        # Fail at once rather than queue behind a poll of a dead unit.
+        self._breaker.before_request(probe=False)
+        async with self._lock:
+            # The PIN register precedes the setpoint, so both go out in a
+            # single write-multiple-registers request.
+            await self._write(GLT_PIN_REGISTER, [int(self._glt_pin), power])
+            self.power_setpoint = power
+            self.setpoint_written_at = time.monotonic()
 
-    def set_block_chp(self, block: bool):
+    async def set_block_chp(self, block: bool):
         """Block or unblock the CHP."""
-        with self._lock:
-            self._send_pin()
-            self._client.write_register(address=8302, value=1 if block else 0)
-
-    def _start_heartbeat(self):
-        """Start the heartbeat timer."""
-        if self._heartbeat_timer:
-            self._heartbeat_timer.cancel()
-        self._heartbeat_timer = threading.Timer(300, self._heartbeat)
-        self._heartbeat_timer.start()
-
-    def _heartbeat(self):
-        """Send the heartbeat to the device."""
-        with self._lock:
-            if self._power_setpoint > 0:
-                self.set_electrical_power(self._power_setpoint)
+        value = 1 if block else 0
+        self._breaker.before_request(probe=False)
+        async with self._lock:
+            if self.power_setpoint is None:
+                # The setpoint register lies between the PIN and the block
+                # register; without a known setpoint to rewrite, the PIN needs
+                # a request of its own.
+                await self._write(GLT_PIN_REGISTER, [int(self._glt_pin)])
+                await self._write(BLOCK_CHP_REGISTER, [value])
+            else:
+                await self._write(
+                    GLT_PIN_REGISTER,
+                    [int(self._glt_pin), self.power_setpoint, value],
+                )
+                self.setpoint_written_at = time.monotonic()
+
+    async def _write(self, address: int, values: list[int]):
+        """Write consecutive holding registers; the caller holds the lock."""
+        self._breaker.before_request(probe=False)
+        try:
+            await self.connection.ensure_connected()
+            result = await self.connection.write_registers(
+                address, values, self._unit_id
+            )
+            if result.isError():
+                raise ModbusException(f"Failed to write registers: {result}")
+            self._answered()
+        except (ConnectionException, ModbusIOException) as e:
+            self._failed(e)
+            raise
+
+    def _answered(self) -> None:
+        """Record a request the unit answered."""
+        self.connection.touch(self._unit_id)
+        self._breaker.record_success()
+
+    def _failed(self, error: ModbusException) -> None:
+        """Record a request that failed on the transport.
+
+        The connection decides whether the session goes with it.
+        """
+        self._breaker.record_failure()
+        _LOGGER.error("Failed to communicate with Modbus device: %s", error)
@@ -0,0 +1,99 @@
+"""Circuit breaker for the Senertec Dachs Modbus integration."""
+
+import logging
+import time
+
+from pymodbus.exceptions import ConnectionException
+
+from .const import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CIRCUIT_RESET_TIMEOUT,
+    CIRCUIT_RESET_TIMEOUT_MAX,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitOpenError(ConnectionException):
+    """Error to indicate that a request was refused without being sent."""
+
+
+class DachsCircuitBreaker:
+    """Stop sending requests to a unit that stopped answering.
+
+    After failure_threshold failed requests in a row the circuit opens and
+    requests fail at once. When reset_timeout has passed, one read is let
+    through as a probe: its success closes the circuit, its failure opens it
+    again for twice as long, up to reset_timeout_max. Writes are only sent
+    while the circuit is closed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        reset_timeout_max: float = CIRCUIT_RESET_TIMEOUT_MAX,
+    ) -> None:
+        """Initialize the breaker."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.reset_timeout_max = reset_timeout_max
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._open_for = reset_timeout
+        self._retry_at = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until the next probe, 0 if closed."""
+        if self.state == CIRCUIT_CLOSED:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def before_request(self, probe: bool) -> None:
+        """Raise CircuitOpenError unless a request may be sent.
+
+        Pass probe=True for reads, which may test an open circuit.
+        """
+        if self.state == CIRCUIT_CLOSED:
+            return
+        # A probe that never reported back is replaced by the next one.
+        if probe and time.monotonic() >= self._retry_at:
+            self.state = CIRCUIT_HALF_OPEN
+            self._retry_at = time.monotonic() + self._open_for
+            return
+        raise CircuitOpenError(
+            f"{self.name} is not answering; next attempt in {self.retry_in:.0f}s"
+        )
+
+    def record_success(self) -> None:
+        """Close the circuit after a request was answered."""
+        if self.state != CIRCUIT_CLOSED:
+            _LOGGER.info("%s is answering again", self.name)
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self._open_for = self.reset_timeout
+
+    def record_failure(self) -> None:
+        """Count a request that failed on the transport."""
+        self.failures += 1
+        if self.state == CIRCUIT_HALF_OPEN:
+            self._open_for = min(self._open_for * 2, self.reset_timeout_max)
+        elif self.state == CIRCUIT_OPEN or self.failures < self.failure_threshold:
+            return
+        else:
+            self.trips += 1
+            _LOGGER.warning(
+                "%s failed %s requests in a row; pausing requests for %ss",
+                self.name,
+                self.failures,
+                self._open_for,
+            )
+        self.state = CIRCUIT_OPEN
+        self._retry_at = time.monotonic() + self._open_for
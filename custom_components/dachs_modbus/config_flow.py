@@ -1,33 +1,108 @@
 """Config flow for Senertec Dachs Modbus integration."""
 
+from ipaddress import IPv4Network
 import logging
 
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
+from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DOMAIN, CONF_GLT_PIN
+from .const import (
+    DOMAIN,
+    CONF_COUNTER_INTERVAL,
+    CONF_FLEET_CONCURRENCY,
+    CONF_GLT_PIN,
+    CONF_READ_SPAN_MAX_GAP,
+    CONF_RETRIES,
+    CONF_SAMPLE_INTERVAL,
+    CONF_TIMEOUT,
+    CONF_UNIT_ID,
+    DEFAULT_COUNTER_INTERVAL,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    DEFAULT_UNIT_ID,
+    READ_SPAN_MAX_GAP,
+    SAMPLE_INTERVAL_MIN,
+    DEVICE_TYPE,
+    DEVICE_TYPES,
+    SERIAL_NUMBER,
+)
+from .discovery import async_identify, async_scan
 
 _LOGGER = logging.getLogger(__name__)
 
+TITLE = "Senertec Dachs"
+
+
+class CannotConnect(HomeAssistantError):
+    """Error to indicate that no Dachs answered at the given address."""
+
+
+async def validate_input(data: dict[str, any]) -> dict[str, any]:
+    """Read the identity registers of the configured unit."""
+    identity = await async_identify(
+        data[CONF_HOST], data[CONF_PORT], data[CONF_UNIT_ID]
+    )
+    if identity is None:
+        raise CannotConnect
+    return identity
+
 
 class DachsModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Senertec Dachs Modbus."""
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Return the options flow."""
+        return DachsModbusOptionsFlow(config_entry)
+
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._user_input: dict[str, any] = {}
+        self._found: dict[str, dict[str, any]] = {}
+
+    async def _async_set_unique_id(self, data: dict[str, any]) -> None:
+        """Set the unique id of the entry and abort if it exists."""
+        # Units behind a shared gateway are told apart by their unit id;
+        # the default unit keeps the plain host as before.
+        unique_id = data[CONF_HOST]
+        if data[CONF_UNIT_ID] != DEFAULT_UNIT_ID:
+            unique_id = f"{unique_id}_{data[CONF_UNIT_ID]}"
+        await self.async_set_unique_id(unique_id)
+        self._abort_if_unique_id_configured()
+
     async def async_step_user(self, user_input=None):
-        """Handle the initial step."""
+        """Handle the initial step.
+
+        A subnet in CIDR notation as host, e.g. 192.168.1.0/24, is scanned
+        for Dachs units to pick from.
+        """
         errors = {}
-        if user_input is not None:
-            await self.async_set_unique_id(user_input[CONF_HOST])
-            self._abort_if_unique_id_configured()
+        if user_input is not None and "/" in user_input[CONF_HOST]:
             try:
-                # Here you would typically validate the user input, e.g.,
-                # try to connect to the device. For this example, we'll
-                # just assume the input is valid.
-                return self.async_create_entry(title="Senertec Dachs", data=user_input)
+                network = IPv4Network(user_input[CONF_HOST], strict=False)
+                self._found = await async_scan(
+                    network, user_input[CONF_PORT], user_input[CONF_UNIT_ID]
+                )
+            except ValueError:
+                errors[CONF_HOST] = "invalid_subnet"
+            else:
+                if self._found:
+                    self._user_input = user_input
+                    return await self.async_step_pick()
+                errors[CONF_HOST] = "no_devices_found"
+        elif user_input is not None:
+            await self._async_set_unique_id(user_input)
+            try:
+                await validate_input(user_input)
+                return self.async_create_entry(title=TITLE, data=user_input)
             except HomeAssistantError:
                 errors["base"] = "cannot_connect"
             except Exception:  # pylint: disable=broad-except
@@ -40,9 +115,98 @@ class DachsModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 {
                     vol.Required(CONF_HOST): str,
                     vol.Required(CONF_PORT, default=502): int,
+                    # Unit id 0 is the broadcast address, which is never
+                    # answered.
+                    vol.Required(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(
+                        int, vol.Range(min=1, max=247)
+                    ),
                     vol.Required(CONF_GLT_PIN): str,
                     vol.Required(CONF_SCAN_INTERVAL, default=30): int,
                 }
             ),
             errors=errors,
         )
+
+    async def async_step_pick(self, user_input=None):
+        """Let the user pick one of the units found by a subnet scan."""
+        if user_input is not None:
+            data = {**self._user_input, CONF_HOST: user_input[CONF_HOST]}
+            await self._async_set_unique_id(data)
+            return self.async_create_entry(title=TITLE, data=data)
+
+        units = {
+            host: (
+                f"{host} ({DEVICE_TYPES[identity[DEVICE_TYPE]]}, "
+                f"{identity.get(SERIAL_NUMBER)})"
+            )
+            for host, identity in self._found.items()
+        }
+        return self.async_show_form(
+            step_id="pick",
+            data_schema=vol.Schema({vol.Required(CONF_HOST): vol.In(units)}),
+        )
+
+
+class DachsModbusOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options of a Senertec Dachs entry.
+
+    Changed options are applied to the running entry without a reload.
+    """
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the polling and connection options."""
+        errors = {}
+        if user_input is not None:
+            if 0 < user_input.get(CONF_SAMPLE_INTERVAL, 0) < SAMPLE_INTERVAL_MIN:
+                errors[CONF_SAMPLE_INTERVAL] = "sample_interval_too_short"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        def current(key: str, default):
+            return self.config_entry.options.get(
+                key, self.config_entry.data.get(key, default)
+            )
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SCAN_INTERVAL, default=current(CONF_SCAN_INTERVAL, 30)
+                    ): vol.All(int, vol.Range(min=1, max=3600)),
+                    vol.Required(
+                        CONF_COUNTER_INTERVAL,
+                        default=current(
+                            CONF_COUNTER_INTERVAL, DEFAULT_COUNTER_INTERVAL
+                        ),
+                    ): vol.All(int, vol.Range(min=1, max=86400)),
+                    vol.Required(
+                        CONF_TIMEOUT, default=current(CONF_TIMEOUT, DEFAULT_TIMEOUT)
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=60)),
+                    vol.Required(
+                        CONF_RETRIES, default=current(CONF_RETRIES, DEFAULT_RETRIES)
+                    ): vol.All(int, vol.Range(min=0, max=10)),
+                    # Shared by all entries, so only a limit set here counts.
+                    vol.Optional(
+                        CONF_FLEET_CONCURRENCY,
+                        description={
+                            "suggested_value": self.config_entry.options.get(
+                                CONF_FLEET_CONCURRENCY
+                            )
+                        },
+                    ): vol.All(int, vol.Range(min=1, max=64)),
+                    vol.Required(
+                        CONF_READ_SPAN_MAX_GAP,
+                        default=current(CONF_READ_SPAN_MAX_GAP, READ_SPAN_MAX_GAP),
+                    ): vol.All(int, vol.Range(min=0, max=64)),
+                    vol.Required(
+                        CONF_SAMPLE_INTERVAL, default=current(CONF_SAMPLE_INTERVAL, 0)
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=300)),
+                }
+            ),
+            errors=errors,
+        )
@@ -0,0 +1,291 @@
+"""Connection management for the Senertec Dachs Modbus integration."""
+
+import asyncio
+import inspect
+import logging
+import random
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import (
+    ConnectionException,
+    ModbusException,
+    ModbusIOException,
+)
+
+from .const import (
+    CONNECTION_STATE_BACKOFF,
+    CONNECTION_STATE_CONNECTED,
+    CONNECTION_STATE_CONNECTING,
+    CONNECTION_STATE_DISCONNECTED,
+    DATA_CONNECTIONS,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    DEFAULT_UNIT_ID,
+    INPUT_REGISTER_START,
+)
+
+KEEPALIVE_INTERVAL = 60
+# Timeouts and retries are applied here so they can change on a live
+# session; pymodbus only gets a bound it never reaches first.
+PYMODBUS_TIMEOUT = 120
+RECONNECT_DELAY = 1
+RECONNECT_DELAY_MAX = 120
+
+# pymodbus 3.10 renamed the unit id keyword from "slave" to "device_id".
+_UNIT_ID_KWARG = (
+    "device_id"
+    if "device_id"
+    in inspect.signature(AsyncModbusTcpClient.read_input_registers).parameters
+    else "slave"
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DachsModbusConnection:
+    """Long-lived Modbus TCP session to a Dachs device or gateway.
+
+    Requests are serialized through lock, so several units behind one
+    gateway can share the session. An idle session is probed with a
+    one-register read so that a socket dropped by the gateway is noticed
+    before the next poll, and failed connection attempts are retried with
+    jittered exponential backoff. A request without a response within
+    timeout seconds is retried up to retries times; both may be changed
+    while the session is up.
+
+    A unit behind a gateway that stops answering does not drop the session
+    of the others: pymodbus ignores a late answer whose transaction id is
+    not that of the pending request. The session is only dropped when the
+    transport fails or none of its units answers any more.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        unit_id: int = DEFAULT_UNIT_ID,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        hass: HomeAssistant | None = None,
+    ):
+        """Initialize the connection.
+
+        With hass, the keepalive runs as a background task of Home
+        Assistant, which cancels it on shutdown.
+        """
+        self.hass = hass
+        self.host = host
+        self.port = port
+        # Units reached through the session, probed by the keepalive.
+        self.unit_ids = [unit_id]
+        self.users = 0
+        self.timeout = timeout
+        self.retries = retries
+        # Reconnects, timeouts and retries are handled here, not by pymodbus.
+        self.client = AsyncModbusTcpClient(
+            host,
+            port=port,
+            reconnect_delay=0,
+            timeout=PYMODBUS_TIMEOUT,
+            retries=0,
+        )
+        self.lock = asyncio.Lock()
+        self.state = CONNECTION_STATE_DISCONNECTED
+        self.consecutive_failures = 0
+        self.reconnects = 0
+        self._has_connected = False
+        self._retry_at = 0.0
+        self._last_activity = 0.0
+        # Units whose last request went unanswered.
+        self._silent_units: set[int] = set()
+        self._keepalive_task: asyncio.Task | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the TCP session is up."""
+        return self.client.connected
+
+    async def ensure_connected(self):
+        """Open the TCP session unless it is up; the caller holds lock."""
+        if self.client.connected:
+            return
+        remaining = self._retry_at - time.monotonic()
+        if remaining > 0:
+            raise ConnectionException(
+                f"Reconnect to {self.host}:{self.port} in {remaining:.1f}s"
+            )
+        self.state = CONNECTION_STATE_CONNECTING
+        try:
+            connected = await asyncio.wait_for(self.client.connect(), self.timeout)
+        except asyncio.TimeoutError:
+            self.client.close()
+            connected = False
+        if not connected:
+            self.consecutive_failures += 1
+            delay = min(
+                RECONNECT_DELAY_MAX,
+                RECONNECT_DELAY * 2 ** (self.consecutive_failures - 1),
+            )
+            self._retry_at = time.monotonic() + random.uniform(delay / 2, delay)
+            self.state = CONNECTION_STATE_BACKOFF
+            raise ConnectionException(f"Failed to connect to {self.host}:{self.port}")
+        if self._has_connected:
+            self.reconnects += 1
+        self._has_connected = True
+        self.consecutive_failures = 0
+        self.state = CONNECTION_STATE_CONNECTED
+        self.touch()
+        if self._keepalive_task is None:
+            if self.hass is None:
+                self._keepalive_task = asyncio.get_running_loop().create_task(
+                    self._keepalive()
+                )
+            else:
+                self._keepalive_task = self.hass.async_create_background_task(
+                    self._keepalive(), f"Dachs Modbus keepalive {self.host}"
+                )
+
+    def configure(self, timeout: float, retries: int) -> None:
+        """Change the timeout and retries of later requests."""
+        self.timeout = timeout
+        self.retries = retries
+
+    async def read_input_registers(self, address: int, count: int, unit_id: int):
+        """Read input registers from a unit; the caller holds lock."""
+        return await self._execute(
+            lambda: self.client.read_input_registers(
+                address=address, count=count, **{_UNIT_ID_KWARG: unit_id}
+            ),
+            unit_id,
+        )
+
+    async def read_holding_registers(self, address: int, count: int, unit_id: int):
+        """Read holding registers from a unit; the caller holds lock."""
+        return await self._execute(
+            lambda: self.client.read_holding_registers(
+                address=address, count=count, **{_UNIT_ID_KWARG: unit_id}
+            ),
+            unit_id,
+        )
+
+    async def write_registers(self, address: int, values: list[int], unit_id: int):
+        """Write consecutive holding registers of a unit; the caller holds lock."""
+        return await self._execute(
+            lambda: self.client.write_registers(
+                address=address, values=values, **{_UNIT_ID_KWARG: unit_id}
+            ),
+            unit_id,
+        )
+
+    async def _execute(self, request, unit_id: int):
+        """Send a request with timeout and retries; the caller holds lock."""
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(request(), self.timeout)
+            # pymodbus turns the cancellation of a timed out request into a
+            # ModbusIOException.
+            except (
+                asyncio.TimeoutError,
+                ConnectionException,
+                ModbusIOException,
+            ) as e:
+                self._request_failed(unit_id, e)
+                if attempt >= self.retries:
+                    raise ModbusIOException(
+                        f"Request to {self.host}:{self.port} failed after "
+                        f"{attempt + 1} attempts: {e}"
+                    ) from e
+            attempt += 1
+            _LOGGER.debug("Retrying request to %s (%s)", self.host, attempt)
+            await self.ensure_connected()
+
+    def touch(self, unit_id: int | None = None):
+        """Record traffic on the session, or an answer of a unit."""
+        self._last_activity = time.monotonic()
+        self._silent_units.discard(unit_id)
+
+    def _request_failed(self, unit_id: int, error: Exception) -> None:
+        """Drop the session if it is gone or none of its units answers."""
+        self._silent_units.add(unit_id)
+        if (
+            isinstance(error, ConnectionException)
+            or not self.client.connected
+            or self._silent_units.issuperset(self.unit_ids)
+        ):
+            self.mark_failed()
+
+    def mark_failed(self):
+        """Drop a session that failed on the transport."""
+        self.client.close()
+        if self.state == CONNECTION_STATE_CONNECTED:
+            self.state = CONNECTION_STATE_DISCONNECTED
+
+    def close(self):
+        """Stop the keepalive and close the session."""
+        if self._keepalive_task:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        self.client.close()
+        self.state = CONNECTION_STATE_DISCONNECTED
+
+    async def _keepalive(self):
+        """Probe the session whenever it has been idle for too long."""
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            if (
+                not self.client.connected
+                or time.monotonic() - self._last_activity < KEEPALIVE_INTERVAL
+            ):
+                continue
+            async with self.lock:
+                # Any unit that answers proves the session is alive; once
+                # none does, the last failed probe drops it.
+                for unit_id in list(self.unit_ids):
+                    try:
+                        result = await self.read_input_registers(
+                            INPUT_REGISTER_START, 1, unit_id
+                        )
+                    except ModbusException as e:
+                        _LOGGER.debug(
+                            "Keepalive to %s unit %s failed: %s", self.host, unit_id, e
+                        )
+                        if not self.client.connected:
+                            break
+                    else:
+                        # An exception response still proves the session is
+                        # alive.
+                        _LOGGER.debug("Keepalive to %s: %s", self.host, result)
+                        self.touch(unit_id)
+                        break
+
+
+@callback
+def async_get_connection(
+    hass: HomeAssistant, host: str, port: int, unit_id: int = DEFAULT_UNIT_ID
+) -> DachsModbusConnection:
+    """Return the shared connection to a host, creating it if needed."""
+    connections = hass.data.setdefault(DATA_CONNECTIONS, {})
+    connection = connections.get((host, port))
+    if connection is None:
+        connection = DachsModbusConnection(host, port, unit_id, hass=hass)
+        connections[(host, port)] = connection
+    else:
+        connection.unit_ids.append(unit_id)
+    connection.users += 1
+    return connection
+
+
+@callback
+def async_release_connection(
+    hass: HomeAssistant, connection: DachsModbusConnection, unit_id: int
+) -> None:
+    """Release a unit's use of a shared connection; close it once unused."""
+    connection.users -= 1
+    if unit_id in connection.unit_ids:
+        connection.unit_ids.remove(unit_id)
+    if connection.users <= 0:
+        hass.data[DATA_CONNECTIONS].pop((connection.host, connection.port), None)
+        connection.close()
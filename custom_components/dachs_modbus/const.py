@@ -1,8 +1,65 @@
 """Constants for the Senertec Dachs Modbus integration."""
 
+from typing import NamedTuple
+
 DOMAIN = "dachs_modbus"
 
 CONF_GLT_PIN = "glt_pin"
+CONF_UNIT_ID = "unit_id"
+CONF_COUNTER_INTERVAL = "counter_interval"
+CONF_READ_SPAN_MAX_GAP = "read_span_max_gap"
+CONF_CAPABILITIES = "capabilities"
+CONF_SAMPLE_INTERVAL = "sample_interval"
+CONF_TIMEOUT = "timeout"
+CONF_RETRIES = "retries"
+CONF_FLEET_CONCURRENCY = "fleet_concurrency"
+
+DEFAULT_COUNTER_INTERVAL = 300
+DEFAULT_UNIT_ID = 1
+# Seconds to wait for a response, and retries of a request without one.
+DEFAULT_TIMEOUT = 3
+DEFAULT_RETRIES = 3
+# Polls of all entries that may run at once.
+DEFAULT_FLEET_CONCURRENCY = 4
+
+# The GLT interface drops an external power request that has not been
+# re-sent within the watchdog window; the heartbeat checks for due
+# setpoints at the check interval.
+SETPOINT_WATCHDOG_WINDOW = 300
+HEARTBEAT_CHECK_INTERVAL = 30
+
+# The scan interval applies while the unit runs or has a pending request.
+# After a control command the unit is polled at the burst interval for the
+# burst duration, and once it has been off or in standby without a request
+# for the idle delay it is polled at the idle interval.
+BURST_POLL_INTERVAL = 5
+BURST_POLL_DURATION = 60
+IDLE_POLL_INTERVAL = 300
+IDLE_POLL_DELAY = 900
+IDLE_UNIT_STATUSES = (0, 1)
+
+# The last good values are stored per entry, written on the first good poll,
+# then at most this often and when Home Assistant stops, so entities can
+# start from them.
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 300
+
+DATA_CONNECTIONS = f"{DOMAIN}_connections"
+DATA_FLEET = f"{DOMAIN}_fleet"
+
+CONNECTION_STATE_CONNECTED = "connected"
+CONNECTION_STATE_CONNECTING = "connecting"
+CONNECTION_STATE_DISCONNECTED = "disconnected"
+CONNECTION_STATE_BACKOFF = "backoff"
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+# Failed requests in a row that open the circuit, and seconds until the
+# first probe; each failed probe doubles the wait up to the maximum.
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT = 30
+CIRCUIT_RESET_TIMEOUT_MAX = 600
 
 # Sensors
 SENSOR_PREFIX = "Dachs"
@@ -39,10 +96,160 @@ OPERATING_HOURS_POWER_LEVEL_2 = "operating_hours_power_level_2"
 OPERATING_HOURS_POWER_LEVEL_3 = "operating_hours_power_level_3"
 CURRENT_DISCHARGE_POWER = "current_discharge_power"
 
+# Derived metrics
+THERMAL_POWER = "thermal_power"
+POWER_TO_HEAT_RATIO = "power_to_heat_ratio"
+STARTS_PER_DAY = "starts_per_day"
+AVERAGE_RUN_LENGTH = "average_run_length"
+BUFFER_STRATIFICATION = "buffer_stratification"
+DERIVED_KEYS = (
+    THERMAL_POWER,
+    POWER_TO_HEAT_RATIO,
+    STARTS_PER_DAY,
+    AVERAGE_RUN_LENGTH,
+    BUFFER_STRATIFICATION,
+)
+
+# Windowed metrics cover the counter readings of the last day, and need at
+# least an hour of readings.
+DERIVED_WINDOW = 86400
+DERIVED_MIN_SPAN = 3600
+# Thermal power is averaged over at least this many seconds, as the energy
+# counter only moves in steps of 0.1 kWh.
+THERMAL_POWER_MIN_SPAN = 900
+
+# Diagnostics
+MODBUS_ROUND_TRIP_TIME = "modbus_round_trip_time"
+DECODE_TIME = "decode_time"
+LOCK_WAIT_TIME = "lock_wait_time"
+CONSECUTIVE_FAILURES = "consecutive_failures"
+RECONNECTS = "reconnects"
+POLL_DURATION_P50 = "poll_duration_p50"
+POLL_DURATION_P95 = "poll_duration_p95"
+POLL_DURATION_P99 = "poll_duration_p99"
+SCHEDULE_DRIFT = "schedule_drift"
+
 # Controls
 SET_ELECTRICAL_POWER = "set_electrical_power"
 BLOCK_CHP_VIA_GLT = "block_chp_via_glt"
 
+# Register map
+INPUT_REGISTER_START = 8000
+INPUT_REGISTER_COUNT = 84
+
+HOLDING_REGISTER_START = 8300
+HOLDING_REGISTER_COUNT = 3
+GLT_PIN_REGISTER = 8300
+SET_ELECTRICAL_POWER_REGISTER = 8301
+BLOCK_CHP_REGISTER = 8302
+
+# Raw register reads, as offered by the read_registers service. Reads of
+# the last REGISTER_CACHE_TTL seconds, including polls, answer them.
+REGISTER_TYPE_INPUT = "input"
+REGISTER_TYPE_HOLDING = "holding"
+REGISTER_CACHE_TTL = 2
+MAX_READ_COUNT = 125
+
+SERVICE_READ_REGISTERS = "read_registers"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_REGISTER_TYPE = "register_type"
+ATTR_ADDRESS = "address"
+ATTR_COUNT = "count"
+
+DATA_TYPE_INT16 = "int16"
+DATA_TYPE_INT32 = "int32"
+DATA_TYPE_STRING = "string"
+
+# Polling tiers: identity values are read once, fast values on every poll and
+# lifetime counters at the slower counter interval.
+TIER_IDENTITY = "identity"
+TIER_FAST = "fast"
+TIER_COUNTER = "counter"
+
+# Registers between two spans of the same tier are read along if the gap is at
+# most this long, as a register costs two bytes and a request a round trip.
+READ_SPAN_MAX_GAP = 16
+
+# With a sample interval configured, these values are also sampled between
+# polls into a ring buffer of this size; each poll publishes mean, min and
+# max of the samples since the previous poll.
+SAMPLED_KEYS = (ELECTRICAL_POWER, CHP_OUTLET_TEMPERATURE, CHP_INLET_TEMPERATURE)
+SAMPLE_BUFFER_SIZE = 1024
+# Shortest sample interval in seconds; 0 turns sampling off.
+SAMPLE_INTERVAL_MIN = 0.2
+
+# Fast values read on every poll, whether or not an entity uses them, as the
+# coordinator picks its poll interval from them.
+POLL_STATE_KEYS = frozenset({UNIT_STATUS, TYPE_OF_REQUEST})
+
+
+class DachsRegister(NamedTuple):
+    """A value in the GLT input register block.
+
+    The offset is counted in registers from INPUT_REGISTER_START, the raw
+    value is divided by scale, length is the number of registers of a
+    string value and tier selects how often the value is polled.
+    """
+
+    key: str
+    offset: int
+    data_type: str
+    scale: int = 1
+    signed: bool = False
+    length: int = 1
+    tier: str = TIER_FAST
+
+
+INPUT_REGISTERS: tuple[DachsRegister, ...] = (
+    DachsRegister(GLT_INTERFACE_VERSION, 0, DATA_TYPE_INT16, tier=TIER_IDENTITY),
+    DachsRegister(DEVICE_TYPE, 1, DATA_TYPE_INT16, tier=TIER_IDENTITY),
+    DachsRegister(SERIAL_NUMBER, 2, DATA_TYPE_STRING, length=10, tier=TIER_IDENTITY),
+    DachsRegister(NOMINAL_POWER, 12, DATA_TYPE_INT16, tier=TIER_IDENTITY),
+    DachsRegister(UNIT_STATUS, 13, DATA_TYPE_INT16),
+    DachsRegister(ELECTRICAL_POWER, 14, DATA_TYPE_INT16, scale=10, signed=True),
+    DachsRegister(TYPE_OF_REQUEST, 15, DATA_TYPE_INT16, signed=True),
+    DachsRegister(RUNTIME_SINCE_LAST_START, 16, DATA_TYPE_INT16, scale=10),
+    DachsRegister(LAST_SHUTDOWN_REASON, 17, DATA_TYPE_INT16),
+    DachsRegister(HEATING_WATER_PUMP_STATUS, 18, DATA_TYPE_INT16),
+    DachsRegister(CHP_OUTLET_TEMPERATURE, 19, DATA_TYPE_INT16, scale=10),
+    DachsRegister(CHP_INLET_TEMPERATURE, 20, DATA_TYPE_INT16, scale=10),
+    DachsRegister(CONTROL_STRATEGY, 21, DATA_TYPE_INT16),
+    DachsRegister(MINIMUM_RUNTIME, 22, DATA_TYPE_INT16),
+    DachsRegister(MAX_INLET_TEMPERATURE, 23, DATA_TYPE_INT16, scale=10, signed=True),
+    DachsRegister(POWER_MODULATION, 24, DATA_TYPE_INT16),
+    DachsRegister(POWER_LEVEL, 25, DATA_TYPE_INT16),
+    DachsRegister(MODULE_TYPE_DEFINITION, 26, DATA_TYPE_INT16, tier=TIER_IDENTITY),
+    DachsRegister(TOTAL_OPERATING_HOURS, 27, DATA_TYPE_INT32, tier=TIER_COUNTER),
+    DachsRegister(TOTAL_STARTS, 29, DATA_TYPE_INT32, tier=TIER_COUNTER),
+    DachsRegister(
+        GENERATED_ELECTRICAL_ENERGY, 31, DATA_TYPE_INT32, scale=10, tier=TIER_COUNTER
+    ),
+    DachsRegister(
+        GENERATED_THERMAL_ENERGY, 33, DATA_TYPE_INT32, scale=10, tier=TIER_COUNTER
+    ),
+    DachsRegister(
+        OPERATING_HOURS_POWER_LEVEL_1, 35, DATA_TYPE_INT32, tier=TIER_COUNTER
+    ),
+    DachsRegister(
+        OPERATING_HOURS_POWER_LEVEL_2, 37, DATA_TYPE_INT32, tier=TIER_COUNTER
+    ),
+    DachsRegister(
+        OPERATING_HOURS_POWER_LEVEL_3, 39, DATA_TYPE_INT32, tier=TIER_COUNTER
+    ),
+    DachsRegister(OUTSIDE_TEMPERATURE, 41, DATA_TYPE_INT16, scale=10, signed=True),
+    DachsRegister(BUFFER_TEMPERATURE_T1, 42, DATA_TYPE_INT16, scale=10, signed=True),
+    DachsRegister(BUFFER_TEMPERATURE_T2, 43, DATA_TYPE_INT16, scale=10, signed=True),
+    DachsRegister(BUFFER_TEMPERATURE_T3, 44, DATA_TYPE_INT16, scale=10, signed=True),
+    DachsRegister(BUFFER_TEMPERATURE_T4, 45, DATA_TYPE_INT16, scale=10, signed=True),
+    DachsRegister(CURRENT_DISCHARGE_POWER, 56, DATA_TYPE_INT16),
+)
+
+# Offsets from HOLDING_REGISTER_START; the GLT PIN at offset 0 is not read.
+HOLDING_REGISTERS: tuple[DachsRegister, ...] = (
+    DachsRegister(SET_ELECTRICAL_POWER, 1, DATA_TYPE_INT16),
+    DachsRegister(BLOCK_CHP_VIA_GLT, 2, DATA_TYPE_INT16),
+)
+
 DEVICE_TYPES = {
     2601: "5.5kW",
     2602: "2.9kW",
@@ -1,35 +1,454 @@
 """Data update coordinator for the Senertec Dachs Modbus integration."""
 
 import logging
+import math
+import time
 from datetime import timedelta
 
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from pymodbus.exceptions import ModbusException
 
 from .api import DachsModbusApiClient
-from .const import DOMAIN
+from .decoder import keys_in_ranges
+from .derived import DachsDerivedMetrics, required_keys
+from .fleet import DachsFleetScheduler
+from .sampler import DachsModbusSampler, SampleStats
+from .snapshot import DachsSnapshot
+from .const import (
+    DOMAIN,
+    BURST_POLL_DURATION,
+    CONF_CAPABILITIES,
+    BURST_POLL_INTERVAL,
+    DEFAULT_COUNTER_INTERVAL,
+    DEVICE_TYPE,
+    GLT_INTERFACE_VERSION,
+    HEARTBEAT_CHECK_INTERVAL,
+    IDLE_POLL_DELAY,
+    IDLE_POLL_INTERVAL,
+    IDLE_UNIT_STATUSES,
+    POLL_STATE_KEYS,
+    READ_SPAN_MAX_GAP,
+    SETPOINT_WATCHDOG_WINDOW,
+    SNAPSHOT_SAVE_DELAY,
+    TIER_COUNTER,
+    TIER_FAST,
+    TIER_IDENTITY,
+    TYPE_OF_REQUEST,
+    UNIT_STATUS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+STORED_TIERS = ("identity", "counters", "controls", "fast")
+
 
 class DachsModbusDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the API."""
 
     def __init__(
-        self, hass: HomeAssistant, client: DachsModbusApiClient, update_interval: int
+        self,
+        hass: HomeAssistant,
+        client: DachsModbusApiClient,
+        update_interval: int,
+        counter_interval: int = DEFAULT_COUNTER_INTERVAL,
+        store: Store | None = None,
+        fleet: DachsFleetScheduler | None = None,
     ) -> None:
-        """Initialize."""
+        """Initialize.
+
+        With a fleet, polls run at the phase the fleet assigns and wait for
+        a slot among the polls of the other entries.
+        """
         self.api = client
+        self._store = store
+        # Monotonic time the pending write of the stored values runs at.
+        self._save_at: float | None = None
+        self._fleet = fleet
+        # Loop time the scheduled poll was planned for, and the one that is
+        # running.
+        self._planned_at: float | None = None
+        self._due_at: float | None = None
+        # Set while the values come from the store rather than the device.
+        self.restored = False
+        self.scan_interval = timedelta(seconds=update_interval)
+        self.counter_interval = counter_interval
+        self._identity: dict | None = None
+        self._counters: dict | None = None
+        self._counters_read_at = 0.0
+        self._controls: dict | None = None
+        self._fast: dict = {}
+        self.derived = DachsDerivedMetrics()
+        self._read_keys: frozenset[str] = frozenset()
+        # Absolute and relative deadband per key, set by the sensor platform.
+        self.deadbands: dict[str, tuple[float | None, float | None]] = {}
+        self._published: dict[str, any] = {}
+        self._published_at: dict[str, float] = {}
+        # Keys whose latest value is held back by their publication policy.
+        self._held_back: set[str] = set()
+        # Minimum seconds between publications per key, set by the sensor
+        # platform.
+        self.publish_intervals: dict[str, float] = {}
+        self._published_snapshot: DachsSnapshot | None = None
+        self._notified_success: bool | None = None
+        self.heartbeat_sent_at = None
+        self.sampler: DachsModbusSampler | None = None
+        self._stop_sampling: CALLBACK_TYPE | None = None
+        # Aggregates of the samples taken since the previous poll.
+        self.samples: dict[str, SampleStats] = {}
+        self._published_samples: dict[str, SampleStats] = {}
+        self._burst_until = 0.0
+        self._idle_since: float | None = None
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=update_interval),
+            update_interval=self.scan_interval,
+        )
+
+    @property
+    def connection_state(self) -> str:
+        """Return the state of the Modbus TCP session."""
+        return self.api.connection.state
+
+    async def async_setup_capabilities(self, entry: ConfigEntry) -> None:
+        """Limit reads to the registers this device type and firmware support.
+
+        The supported register ranges are probed once per device type and
+        GLT version and kept in the config entry.
+        """
+        try:
+            if self._identity is None:
+                self._identity = await self.api.get_tier_data(TIER_IDENTITY)
+            firmware = (
+                f"{self._identity[DEVICE_TYPE]}_{self._identity[GLT_INTERFACE_VERSION]}"
+            )
+            capabilities = entry.data.get(CONF_CAPABILITIES, {})
+            ranges = capabilities.get(firmware)
+            if ranges is None:
+                ranges = await self.api.probe_input_ranges()
+                self.hass.config_entries.async_update_entry(
+                    entry,
+                    data={
+                        **entry.data,
+                        CONF_CAPABILITIES: {**capabilities, firmware: ranges},
+                    },
+                )
+        except ModbusException as exception:
+            raise ConfigEntryNotReady(exception) from exception
+        self.api.set_supported_keys(keys_in_ranges(ranges))
+
+    @callback
+    def async_start_heartbeat(self) -> CALLBACK_TYPE:
+        """Start re-sending the power setpoint; return the stop callback."""
+        return async_track_time_interval(
+            self.hass,
+            self._async_heartbeat,
+            timedelta(seconds=HEARTBEAT_CHECK_INTERVAL),
         )
 
-    async def _async_update_data(self):
-        """Update data via library."""
+    async def _async_heartbeat(self, now=None) -> None:
+        """Re-send the setpoint before the GLT watchdog window runs out."""
+        setpoint = self.api.power_setpoint
+        if not setpoint:
+            return
+        # Skip if a write refreshed the setpoint recently enough to last
+        # until the next check.
+        age = time.monotonic() - self.api.setpoint_written_at
+        if age + HEARTBEAT_CHECK_INTERVAL < SETPOINT_WATCHDOG_WINDOW:
+            return
         try:
-            return await self.hass.async_add_executor_job(self.api.get_data)
+            await self.api.set_electrical_power(setpoint)
+        except ModbusException as e:
+            _LOGGER.warning("Setpoint heartbeat failed: %s", e)
+            return
+        self.heartbeat_sent_at = dt_util.utcnow()
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule the next poll at the phase of this unit in the fleet.
+
+        DataUpdateCoordinator._schedule_refresh schedules the next refresh
+        update_interval seconds from now, rounded to the second; for that
+        call the interval is the delay to the phase.
+        """
+        interval = self.update_interval
+        if self._fleet is None or interval is None:
+            super()._schedule_refresh()
+            return
+        now = self.hass.loop.time()
+        self._planned_at = self._fleet.next_run(self, now, interval.total_seconds())
+        self.update_interval = timedelta(seconds=self._planned_at - now)
+        try:
+            super()._schedule_refresh()
+        finally:
+            self.update_interval = interval
+
+    async def _handle_refresh_interval(self, _now=None) -> None:
+        """Run a scheduled poll."""
+        self._due_at = self._planned_at
+        await super()._handle_refresh_interval(_now)
+
+    async def _async_update_data(self) -> DachsSnapshot:
+        """Update data via library, in a fleet slot if there is a fleet."""
+        if self._fleet is None:
+            return await self._async_poll()
+        async with self._fleet.semaphore:
+            if self._due_at is not None:
+                self.api.telemetry.schedule_drift = self.hass.loop.time() - self._due_at
+                self._due_at = None
+            return await self._async_poll()
+
+    async def _async_poll(self) -> DachsSnapshot:
+        """Read the due tiers and return the new snapshot."""
+        started = time.perf_counter()
+        self._update_read_plan()
+        try:
+            if self._identity is None or self.restored:
+                self._identity = await self.api.get_tier_data(TIER_IDENTITY)
+            now = time.monotonic()
+            if (
+                self._counters is None
+                or self.restored
+                or now - self._counters_read_at >= self.counter_interval
+            ):
+                self._counters = await self.api.get_tier_data(TIER_COUNTER)
+                self.derived.update_counters(self._counters, now)
+                # Controls change through our own writes, which read them
+                # back; external changes are picked up at this slower rate.
+                self._controls = await self.api.get_control_data()
+                self._counters_read_at = now
+            self._fast = await self.api.get_tier_data(TIER_FAST)
         except Exception as exception:
+            self.api.telemetry.record_poll(time.perf_counter() - started, False)
+            # While the circuit is open the next poll waits for the probe.
+            self.update_interval = max(
+                self.scan_interval, timedelta(seconds=self.api.breaker.retry_in)
+            )
             raise UpdateFailed(exception) from exception
+        self.api.telemetry.record_poll(time.perf_counter() - started, True)
+        self.derived.update_fast(self._fast)
+        self.update_interval = self._next_interval(self._fast)
+        if self.sampler is not None:
+            self.samples = self.sampler.async_drain()
+        self.restored = False
+        if self._store is not None:
+            self._async_save_values()
+        return self._snapshot()
+
+    @callback
+    def _async_save_values(self) -> None:
+        """Have the store write the latest values at the next save time.
+
+        The store moves a delayed write back on every call, so the delay
+        counts down to a fixed time instead of starting over each poll.
+        """
+        now = time.monotonic()
+        if self._save_at is None:
+            self._save_at = now
+        elif self._save_at < now:
+            self._save_at = max(now, self._save_at + SNAPSHOT_SAVE_DELAY)
+        # Taken now: by the time the save runs, a later poll may have
+        # dropped a tier to read it again, and failed.
+        stored = self._stored_data()
+        self._store.async_delay_save(lambda: stored, self._save_at - now)
+
+    @callback
+    def _stored_data(self) -> dict[str, dict]:
+        """Return a copy of the latest values of all tiers for the store."""
+        return {
+            "identity": dict(self._identity),
+            "counters": dict(self._counters),
+            "controls": dict(self._controls or {}),
+            "fast": dict(self._fast),
+            "derived": dict(self.derived.values),
+        }
+
+    async def async_restore(self) -> bool:
+        """Publish the stored values of the last run, if there are any.
+
+        Identity, counter and control values are read again on the next
+        poll.
+        """
+        if self._store is None or not (stored := await self._store.async_load()):
+            return False
+        if not all(isinstance(stored.get(tier), dict) for tier in STORED_TIERS):
+            _LOGGER.debug("Ignoring incomplete stored values: %s", stored)
+            return False
+        self._identity = stored["identity"]
+        self._counters = stored["counters"]
+        self._controls = stored["controls"]
+        self._fast = stored["fast"]
+        self.derived.values.update(stored.get("derived") or {})
+        self.restored = True
+        self.data = self._snapshot()
+        return True
+
+    def _snapshot(self) -> DachsSnapshot:
+        """Return a snapshot of the latest values of all tiers."""
+        return DachsSnapshot(
+            {
+                **self._identity,
+                **self._counters,
+                **self._controls,
+                **self._fast,
+                **self.derived.values,
+            }
+        )
+
+    def _update_read_plan(self) -> None:
+        """Read only the registers of the entities listening to this poll.
+
+        Derived metrics need the registers they are computed from. Disabled
+        entities never subscribe, and entities that are enabled or
+        disabled later change the contexts, so the plan follows the entity
+        registry. Without listeners, e.g. on the first refresh, all
+        registers are read.
+        """
+        keys = frozenset(
+            key for context in self.async_contexts() for key in required_keys(context)
+        )
+        if keys == self._read_keys:
+            return
+        self._read_keys = keys
+        self.api.set_read_keys(keys | POLL_STATE_KEYS if keys else None)
+        # Counter values of newly subscribed keys should not wait for the
+        # counter interval.
+        self._counters = None
+
+    def _next_interval(self, fast: dict) -> timedelta:
+        """Return the poll interval for the state of the unit."""
+        now = time.monotonic()
+        if now < self._burst_until:
+            return min(self.scan_interval, timedelta(seconds=BURST_POLL_INTERVAL))
+        if fast.get(UNIT_STATUS) not in IDLE_UNIT_STATUSES or fast.get(TYPE_OF_REQUEST):
+            self._idle_since = None
+            return self.scan_interval
+        if self._idle_since is None:
+            self._idle_since = now
+        if now - self._idle_since < IDLE_POLL_DELAY:
+            return self.scan_interval
+        return max(self.scan_interval, timedelta(seconds=IDLE_POLL_INTERVAL))
+
+    @callback
+    def async_apply_options(
+        self,
+        scan_interval: int,
+        counter_interval: int,
+        timeout: float,
+        retries: int,
+        max_gap: int = READ_SPAN_MAX_GAP,
+    ) -> None:
+        """Apply changed options to the running coordinator and connection."""
+        self.scan_interval = timedelta(seconds=scan_interval)
+        self.counter_interval = counter_interval
+        self.api.connection.configure(timeout, retries)
+        self.api.set_max_gap(max_gap)
+        self.update_interval = self._next_interval(self._fast)
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def async_set_sample_interval(self, interval: float | None) -> None:
+        """Start, change or, with no interval, stop sampling between polls."""
+        if self.sampler is not None and self.sampler.interval == interval:
+            return
+        if self._stop_sampling is not None:
+            self._stop_sampling()
+            self._stop_sampling = None
+        self.sampler = None
+        self.samples = {}
+        if interval:
+            self.sampler = DachsModbusSampler(self.hass, self.api, interval)
+            self._stop_sampling = self.sampler.async_start()
+
+    @callback
+    def async_start_burst(self) -> None:
+        """Poll at the burst interval to follow the unit's reaction."""
+        self._burst_until = time.monotonic() + BURST_POLL_DURATION
+        self._idle_since = None
+        self.update_interval = min(
+            self.scan_interval, timedelta(seconds=BURST_POLL_INTERVAL)
+        )
+        if self._listeners:
+            self._schedule_refresh()
+
+    async def async_refresh_controls(self) -> None:
+        """Read back the control registers after a write and publish them."""
+        self.async_start_burst()
+        self._controls = await self.api.get_control_data()
+        if self.data is not None:
+            self.data = self._snapshot()
+            self.async_update_listeners()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the listeners whose value changed beyond its deadband."""
+        notify_all = (
+            not self.last_update_success
+            or self.last_update_success != self._notified_success
+        )
+        self._notified_success = self.last_update_success
+        changed = self._changed_keys(notify_all)
+        if notify_all:
+            super().async_update_listeners()
+            return
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or context in changed:
+                update_callback()
+
+    def _changed_keys(self, force: bool) -> set[str]:
+        """Return the keys to publish and remember their published values."""
+        changed = {
+            key
+            for key, stats in self.samples.items()
+            if self._published_samples.get(key) != stats
+        }
+        self._published_samples = self.samples
+        if not force and not self._held_back and self.data == self._published_snapshot:
+            return changed
+        self._published_snapshot = self.data
+        now = time.monotonic()
+        for key, value in (self.data or {}).items():
+            if (
+                force
+                or key not in self._published
+                or self._should_publish(key, value, now)
+            ):
+                self._published[key] = value
+                self._published_at[key] = now
+                self._held_back.discard(key)
+                changed.add(key)
+            elif value != self._published[key]:
+                self._held_back.add(key)
+            else:
+                self._held_back.discard(key)
+        return changed
+
+    def _should_publish(self, key: str, value, now: float) -> bool:
+        """Return True if value should replace the published value.
+
+        A value is published once it exceeds its deadband or, for keys with
+        a publish interval, once the interval since the last publication has
+        passed. Keys with neither are published on every change.
+        """
+        published = self._published[key]
+        if value == published:
+            return False
+        if value is None or published is None:
+            return True
+        interval = self.publish_intervals.get(key)
+        if interval is not None and now - self._published_at[key] >= interval:
+            return True
+        if key not in self.deadbands:
+            return interval is None
+        absolute, relative = self.deadbands[key]
+        threshold = max(absolute or 0, (relative or 0) * abs(published))
+        difference = abs(value - published)
+        # Scaled register values carry float noise, e.g. 5.6 - 5.5 < 0.1.
+        return difference >= threshold or math.isclose(difference, threshold)
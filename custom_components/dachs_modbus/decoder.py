@@ -0,0 +1,149 @@
+"""Register decoding for the Senertec Dachs Modbus integration."""
+
+import struct
+
+from .const import (
+    DATA_TYPE_INT16,
+    DATA_TYPE_INT32,
+    DATA_TYPE_STRING,
+    HOLDING_REGISTER_COUNT,
+    HOLDING_REGISTERS,
+    INPUT_REGISTER_COUNT,
+    INPUT_REGISTERS,
+    READ_SPAN_MAX_GAP,
+    SAMPLED_KEYS,
+    TIER_COUNTER,
+    TIER_FAST,
+    TIER_IDENTITY,
+    DachsRegister,
+)
+
+
+def _format_code(register: DachsRegister) -> str:
+    """Return the struct format code for a register definition."""
+    if register.data_type == DATA_TYPE_INT16:
+        return "h" if register.signed else "H"
+    if register.data_type == DATA_TYPE_INT32:
+        return "i" if register.signed else "I"
+    if register.data_type == DATA_TYPE_STRING:
+        return f"{register.length * 2}s"
+    raise ValueError(f"Unknown data type: {register.data_type}")
+
+
+def _register_count(register: DachsRegister) -> int:
+    """Return the number of registers a definition occupies."""
+    if register.data_type == DATA_TYPE_INT32:
+        return 2
+    if register.data_type == DATA_TYPE_STRING:
+        return register.length
+    return 1
+
+
+class RegisterDecoder:
+    """Decode a contiguous register span with one precompiled struct."""
+
+    def __init__(
+        self, registers: tuple[DachsRegister, ...], start: int, count: int
+    ) -> None:
+        """Compile the struct layout for registers within the span."""
+        fmt = ">"
+        position = start
+        keys = []
+        scaled = []
+        strings = []
+        for register in sorted(registers, key=lambda r: r.offset):
+            end = register.offset + _register_count(register)
+            if register.offset < start or end > start + count:
+                continue
+            if register.offset < position:
+                raise ValueError(f"Overlapping register: {register.key}")
+            if register.offset > position:
+                fmt += f"{(register.offset - position) * 2}x"
+            fmt += _format_code(register)
+            position = end
+            keys.append(register.key)
+            if register.data_type == DATA_TYPE_STRING:
+                strings.append(register.key)
+            elif register.scale != 1:
+                scaled.append((register.key, register.scale))
+        self.start = start
+        self.count = count
+        self.keys = tuple(keys)
+        self._struct = struct.Struct(fmt)
+        self._words = struct.Struct(f">{count}H")
+        self._scaled = tuple(scaled)
+        self._strings = tuple(strings)
+
+    def decode(self, data: bytes, offset: int = 0) -> dict[str, any]:
+        """Decode raw big-endian register bytes."""
+        result = dict(zip(self.keys, self._struct.unpack_from(data, offset)))
+        for key, scale in self._scaled:
+            result[key] = result[key] / scale
+        for key in self._strings:
+            result[key] = result[key].rstrip(b"\x00").decode("utf-8")
+        return result
+
+    def decode_registers(self, registers: list[int]) -> dict[str, any]:
+        """Decode the register values returned by pymodbus."""
+        return self.decode(self._words.pack(*registers))
+
+
+def build_read_plan(
+    registers: tuple[DachsRegister, ...], max_gap: int = READ_SPAN_MAX_GAP
+) -> tuple[RegisterDecoder, ...]:
+    """Group registers into as few contiguous read spans as the gap allows."""
+    spans = []
+    for register in sorted(registers, key=lambda r: r.offset):
+        end = register.offset + _register_count(register)
+        if spans and register.offset - spans[-1][1] <= max_gap:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([register.offset, end])
+    return tuple(RegisterDecoder(registers, start, end - start) for start, end in spans)
+
+
+def keys_in_ranges(ranges: list[tuple[int, int]]) -> frozenset[str]:
+    """Return the keys of the input registers within (offset, count) ranges."""
+    return frozenset(
+        register.key
+        for register in INPUT_REGISTERS
+        if any(
+            start <= register.offset
+            and register.offset + _register_count(register) <= start + count
+            for start, count in ranges
+        )
+    )
+
+
+INPUT_REGISTER_DECODER = RegisterDecoder(INPUT_REGISTERS, 0, INPUT_REGISTER_COUNT)
+
+HOLDING_REGISTER_DECODER = RegisterDecoder(HOLDING_REGISTERS, 0, HOLDING_REGISTER_COUNT)
+
+
+def build_tier_plans(
+    keys: frozenset[str] | None = None, max_gap: int = READ_SPAN_MAX_GAP
+) -> dict[str, tuple[RegisterDecoder, ...]]:
+    """Build the read plan of every tier.
+
+    With keys given, the fast and counter tiers only read the registers of
+    those keys; identity values are read once and always in full.
+    """
+    return {
+        tier: build_read_plan(
+            tuple(
+                r
+                for r in INPUT_REGISTERS
+                if r.tier == tier
+                and (keys is None or tier == TIER_IDENTITY or r.key in keys)
+            ),
+            max_gap,
+        )
+        for tier in (TIER_IDENTITY, TIER_FAST, TIER_COUNTER)
+    }
+
+
+TIER_READ_PLANS = build_tier_plans()
+
+SAMPLE_READ_PLAN = build_read_plan(
+    tuple(r for r in INPUT_REGISTERS if r.key in SAMPLED_KEYS)
+)
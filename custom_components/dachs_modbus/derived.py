@@ -0,0 +1,131 @@
+"""Derived metrics for the Senertec Dachs Modbus integration."""
+
+from collections import deque
+from collections.abc import Mapping
+from typing import NamedTuple
+
+from .const import (
+    AVERAGE_RUN_LENGTH,
+    BUFFER_STRATIFICATION,
+    BUFFER_TEMPERATURE_T1,
+    BUFFER_TEMPERATURE_T4,
+    DERIVED_MIN_SPAN,
+    DERIVED_WINDOW,
+    GENERATED_ELECTRICAL_ENERGY,
+    GENERATED_THERMAL_ENERGY,
+    POWER_TO_HEAT_RATIO,
+    STARTS_PER_DAY,
+    THERMAL_POWER,
+    TOTAL_OPERATING_HOURS,
+    THERMAL_POWER_MIN_SPAN,
+    TOTAL_STARTS,
+)
+
+# Register values each derived metric is computed from.
+DERIVED_INPUTS: dict[str, tuple[str, ...]] = {
+    THERMAL_POWER: (GENERATED_THERMAL_ENERGY,),
+    POWER_TO_HEAT_RATIO: (GENERATED_ELECTRICAL_ENERGY, GENERATED_THERMAL_ENERGY),
+    STARTS_PER_DAY: (TOTAL_STARTS,),
+    AVERAGE_RUN_LENGTH: (TOTAL_OPERATING_HOURS, TOTAL_STARTS),
+    BUFFER_STRATIFICATION: (BUFFER_TEMPERATURE_T1, BUFFER_TEMPERATURE_T4),
+}
+
+
+def required_keys(key: str) -> tuple[str, ...]:
+    """Return the register keys a value is read or derived from."""
+    return DERIVED_INPUTS.get(key, (key,))
+
+
+class _CounterReading(NamedTuple):
+    """Lifetime counters at one point in time (time.monotonic)."""
+
+    time: float
+    electrical_energy: float | None
+    thermal_energy: float | None
+    starts: int | None
+    operating_hours: int | None
+
+
+def _delta(new: _CounterReading, old: _CounterReading, field: str) -> float | None:
+    """Return the increase of a counter, None if unknown or reset."""
+    new_value = getattr(new, field)
+    old_value = getattr(old, field)
+    if new_value is None or old_value is None or new_value < old_value:
+        return None
+    return new_value - old_value
+
+
+def _ratio(numerator: float | None, denominator: float | None) -> float | None:
+    """Divide, None if either side is unknown or the denominator is zero."""
+    if numerator is None or not denominator:
+        return None
+    return numerator / denominator
+
+
+class DachsDerivedMetrics:
+    """Metrics computed from consecutive readings instead of templates.
+
+    Each counter reading costs one deque append and the deltas against the
+    previous reading and the oldest reading within the window.
+    """
+
+    def __init__(self, window: float = DERIVED_WINDOW) -> None:
+        """Initialize the metrics."""
+        self.window = window
+        self.values: dict[str, float | None] = {}
+        self._readings: deque[_CounterReading] = deque()
+
+    def update_counters(self, counters: Mapping[str, any], now: float) -> None:
+        """Update the metrics that follow the lifetime counters."""
+        reading = _CounterReading(
+            now,
+            counters.get(GENERATED_ELECTRICAL_ENERGY),
+            counters.get(GENERATED_THERMAL_ENERGY),
+            counters.get(TOTAL_STARTS),
+            counters.get(TOTAL_OPERATING_HOURS),
+        )
+        self._readings.append(reading)
+        while now - self._readings[0].time > self.window:
+            self._readings.popleft()
+        oldest = self._readings[0]
+        span = now - oldest.time
+
+        values = self.values
+        # The newest reading at least THERMAL_POWER_MIN_SPAN old.
+        base = next(
+            (
+                old
+                for old in reversed(self._readings)
+                if now - old.time >= THERMAL_POWER_MIN_SPAN
+            ),
+            None,
+        )
+        if base is None:
+            values[THERMAL_POWER] = None
+        else:
+            # kWh per hour, in kW.
+            values[THERMAL_POWER] = _ratio(
+                _delta(reading, base, "thermal_energy"), (now - base.time) / 3600
+            )
+        if span < DERIVED_MIN_SPAN:
+            values[POWER_TO_HEAT_RATIO] = None
+            values[STARTS_PER_DAY] = None
+            values[AVERAGE_RUN_LENGTH] = None
+            return
+        values[POWER_TO_HEAT_RATIO] = _ratio(
+            _delta(reading, oldest, "electrical_energy"),
+            _delta(reading, oldest, "thermal_energy"),
+        )
+        starts = _delta(reading, oldest, "starts")
+        values[STARTS_PER_DAY] = _ratio(starts, span / 86400)
+        values[AVERAGE_RUN_LENGTH] = _ratio(
+            _delta(reading, oldest, "operating_hours"), starts
+        )
+
+    def update_fast(self, fast: Mapping[str, any]) -> None:
+        """Update the metrics that follow the fast values."""
+        top = fast.get(BUFFER_TEMPERATURE_T1)
+        bottom = fast.get(BUFFER_TEMPERATURE_T4)
+        self.values[BUFFER_STRATIFICATION] = (
+            None if top is None or bottom is None else round(top - bottom, 1)
+        )
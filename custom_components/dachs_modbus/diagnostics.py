@@ -0,0 +1,37 @@
+"""Diagnostics support for the Senertec Dachs Modbus integration."""
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_GLT_PIN, SERIAL_NUMBER
+from .coordinator import DachsModbusDataUpdateCoordinator
+
+TO_REDACT = {CONF_GLT_PIN, SERIAL_NUMBER}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, any]:
+    """Return diagnostics for a config entry."""
+    coordinator: DachsModbusDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    connection = coordinator.api.connection
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "connection": {
+            "state": connection.state,
+            "consecutive_failures": connection.consecutive_failures,
+            "reconnects": connection.reconnects,
+            "shared_by": connection.users,
+        },
+        "circuit": {
+            "state": coordinator.api.breaker.state,
+            "failures": coordinator.api.breaker.failures,
+            "trips": coordinator.api.breaker.trips,
+            "retry_in": coordinator.api.breaker.retry_in,
+        },
+        "telemetry": coordinator.api.telemetry.as_dict(),
+        "heartbeat_sent_at": coordinator.heartbeat_sent_at,
+        "last_update_success": coordinator.last_update_success,
+        "data": async_redact_data(coordinator.data or {}, TO_REDACT),
+    }
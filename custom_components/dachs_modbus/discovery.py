@@ -0,0 +1,77 @@
+"""Device discovery for the Senertec Dachs Modbus integration."""
+
+import asyncio
+from ipaddress import IPv4Network
+import logging
+
+from pymodbus.exceptions import ModbusException
+
+from .api import DachsModbusApiClient
+from .connection import DachsModbusConnection
+from .const import DEVICE_TYPE, DEVICE_TYPES, TIER_IDENTITY
+
+# A probe gives up quickly: a Dachs on the local network answers within
+# milliseconds, and a scan waits on hundreds of silent addresses at once.
+PROBE_TIMEOUT = 2
+SCAN_CONCURRENCY = 64
+SCAN_MAX_HOSTS = 1024
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_identify(
+    host: str, port: int, unit_id: int, timeout: float = PROBE_TIMEOUT
+) -> dict[str, any] | None:
+    """Return the identity values of the Dachs at host, None if there is none.
+
+    Only units whose device type register holds a known Dachs type count.
+    """
+    connection = DachsModbusConnection(host, port, unit_id, timeout=timeout, retries=0)
+    client = DachsModbusApiClient(host, port, "", unit_id, connection=connection)
+    try:
+        identity = await client.get_tier_data(TIER_IDENTITY)
+    except ModbusException as e:
+        _LOGGER.debug("No Dachs at %s:%s: %s", host, port, e)
+        return None
+    finally:
+        connection.close()
+    if identity.get(DEVICE_TYPE) not in DEVICE_TYPES:
+        _LOGGER.debug("Unknown device type at %s:%s: %s", host, port, identity)
+        return None
+    return identity
+
+
+async def _async_port_open(host: str, port: int, timeout: float) -> bool:
+    """Return True if host accepts TCP connections on port."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+async def async_scan(
+    network: IPv4Network,
+    port: int,
+    unit_id: int,
+    timeout: float = PROBE_TIMEOUT,
+) -> dict[str, dict[str, any]]:
+    """Return the identity values of the Dachs units found in network by host.
+
+    Hosts are checked for an open port concurrently, and only hosts with
+    the port open are asked for their identity registers.
+    """
+    if network.num_addresses > SCAN_MAX_HOSTS:
+        raise ValueError(f"{network} has more than {SCAN_MAX_HOSTS} addresses")
+    semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+
+    async def probe(host: str) -> dict[str, any] | None:
+        async with semaphore:
+            if not await _async_port_open(host, port, timeout):
+                return None
+            return await async_identify(host, port, unit_id, timeout)
+
+    hosts = [str(address) for address in network.hosts()]
+    results = await asyncio.gather(*(probe(host) for host in hosts))
+    return {host: identity for host, identity in zip(hosts, results) if identity}
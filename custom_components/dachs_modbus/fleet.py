@@ -0,0 +1,97 @@
+"""Shared poll schedule for the Senertec Dachs Modbus integration."""
+
+import asyncio
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_FLEET, DEFAULT_FLEET_CONCURRENCY
+
+
+def _phase(slot: int) -> float:
+    """Return the slot-th value of the base 2 van der Corput sequence."""
+    phase = 0.0
+    denominator = 1
+    while slot:
+        denominator *= 2
+        slot, bit = divmod(slot, 2)
+        phase += bit / denominator
+    return phase
+
+
+class DachsFleetScheduler:
+    """Spread and limit the polls of all Dachs entries of this instance.
+
+    Each member gets a phase in [0, 1) and polls at the loop times where
+    time modulo its interval equals phase times the interval. Phases follow
+    the van der Corput sequence (0, 1/2, 1/4, 3/4, ...), so the members on
+    one interval stay spread evenly as units join, and existing members
+    keep their phase.
+
+    Each member may ask for a limit of polls that run at once; the lowest
+    one applies, so the limit does not depend on the order entries set up.
+    Without any, the default limit applies.
+    """
+
+    def __init__(self, limit: int = DEFAULT_FLEET_CONCURRENCY) -> None:
+        """Initialize the scheduler."""
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self._default_limit = limit
+        self._slots: dict[object, int] = {}
+        self._limits: dict[object, int] = {}
+
+    def set_limit(self, member: object, limit: int | None) -> None:
+        """Change the limit a member asks for; None withdraws it.
+
+        Polls already waiting finish under the previous limit.
+        """
+        if limit is None:
+            self._limits.pop(member, None)
+        else:
+            self._limits[member] = limit
+        limit = min(self._limits.values(), default=self._default_limit)
+        if limit != self.limit:
+            self.limit = limit
+            self.semaphore = asyncio.Semaphore(limit)
+
+    @callback
+    def async_join(self, member: object, limit: int | None = None) -> float:
+        """Add a member and return its phase."""
+        if member not in self._slots:
+            used = set(self._slots.values())
+            self._slots[member] = next(
+                slot for slot in range(len(used) + 1) if slot not in used
+            )
+        if limit is not None:
+            self.set_limit(member, limit)
+        return self.phase(member)
+
+    @callback
+    def async_leave(self, member: object) -> None:
+        """Remove a member; its phase goes to the next one to join."""
+        self._slots.pop(member, None)
+        self.set_limit(member, None)
+
+    def phase(self, member: object) -> float:
+        """Return the phase of a member."""
+        return _phase(self._slots[member])
+
+    def next_run(self, member: object, now: float, interval: float) -> float:
+        """Return the loop time of the next poll of a member.
+
+        The next poll is at least half an interval away, so a poll that
+        ran off its phase does not get an early successor.
+        """
+        offset = self.phase(member) * interval
+        run = now - (now - offset) % interval
+        while run < now + interval / 2:
+            run += interval
+        return run
+
+
+@callback
+def async_get_fleet(hass: HomeAssistant) -> DachsFleetScheduler:
+    """Return the scheduler shared by all entries, creating it if needed."""
+    if DATA_FLEET not in hass.data:
+        hass.data[DATA_FLEET] = DachsFleetScheduler()
+    return hass.data[DATA_FLEET]
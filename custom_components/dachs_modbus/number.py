@@ -3,14 +3,22 @@
 import logging
 
 from homeassistant.components.number import NumberEntity, NumberEntityDescription
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.const import UnitOfPower
+from pymodbus.exceptions import ModbusException
 
+from .breaker import CircuitOpenError
 from .const import DOMAIN, SENSOR_PREFIX, SET_ELECTRICAL_POWER
 from .coordinator import DachsModbusDataUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+# Slider drags send bursts of values; only the last one within this window
+# is written to the device.
+SETPOINT_DEBOUNCE_COOLDOWN = 0.5
+
 NUMBER_TYPES: tuple[NumberEntityDescription, ...] = (
     NumberEntityDescription(
         key=SET_ELECTRICAL_POWER,
@@ -46,6 +54,20 @@ class DachsModbusNumber(CoordinatorEntity, NumberEntity):
         self._attr_unique_id = (
             f"{self._config_entry.entry_id}_{self.entity_description.key}"
         )
+        # Requested setpoint shown until the write has been read back.
+        self._pending_value: int | None = None
+        self._debouncer = Debouncer(
+            coordinator.hass,
+            _LOGGER,
+            cooldown=SETPOINT_DEBOUNCE_COOLDOWN,
+            immediate=False,
+            function=self._async_write_setpoint,
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop a setpoint that has not been written yet."""
+        await super().async_will_remove_from_hass()
+        self._debouncer.async_cancel()
 
     @property
     def device_info(self):
@@ -61,6 +83,8 @@ class DachsModbusNumber(CoordinatorEntity, NumberEntity):
     @property
     def native_value(self) -> float | None:
         """Return the state of the entity."""
+        if self._pending_value is not None:
+            return self._pending_value
         return self.coordinator.data.get(self.entity_description.key)
 
     @property
@@ -70,7 +94,37 @@ class DachsModbusNumber(CoordinatorEntity, NumberEntity):
 
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
-        await self.hass.async_to_executor(
-            self.coordinator.api.set_electrical_power, int(value)
-        )
-        await self.coordinator.async_request_refresh()
+        # The write runs after this returns; refuse here while it could
+        # only fail.
+        try:
+            self.coordinator.api.breaker.before_request(probe=False)
+        except CircuitOpenError as e:
+            raise HomeAssistantError(f"Failed to set the power setpoint: {e}") from e
+        self._pending_value = int(value)
+        self.async_write_ha_state()
+        await self._debouncer.async_call()
+
+    async def _async_write_setpoint(self) -> None:
+        """Write the latest requested setpoint and read it back.
+
+        The debouncer drops calls made while a write runs, so a value
+        requested meanwhile is written right after it.
+        """
+        while (value := self._pending_value) is not None:
+            # The debouncer runs this after the service call returned.
+            try:
+                await self.coordinator.api.set_electrical_power(value)
+            except ModbusException as e:
+                _LOGGER.error("Failed to set the power setpoint to %s W: %s", value, e)
+            else:
+                try:
+                    await self.coordinator.async_refresh_controls()
+                except ModbusException as e:
+                    _LOGGER.warning(
+                        "Set the power setpoint to %s W, but failed to read it back: %s",
+                        value,
+                        e,
+                    )
+            if self._pending_value == value:
+                self._pending_value = None
+                self.async_write_ha_state()
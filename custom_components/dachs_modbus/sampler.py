@@ -0,0 +1,111 @@
+"""High-rate sampling for the Senertec Dachs Modbus integration."""
+
+from array import array
+from datetime import timedelta
+import logging
+from statistics import fmean
+from typing import NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from pymodbus.exceptions import ModbusException
+
+from .api import DachsModbusApiClient
+from .const import SAMPLE_BUFFER_SIZE, SAMPLED_KEYS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SampleStats(NamedTuple):
+    """Aggregate of the samples taken during one publication interval."""
+
+    mean: float
+    min: float
+    max: float
+    count: int
+
+
+class SampleRing:
+    """Fixed-size ring buffer of float samples.
+
+    drain() aggregates the samples appended since the previous drain; if
+    more samples than fit were appended, only the newest are aggregated.
+    """
+
+    __slots__ = ("_values", "_size", "_next", "_pending")
+
+    def __init__(self, size: int = SAMPLE_BUFFER_SIZE) -> None:
+        """Allocate the buffer."""
+        self._values = array("d", bytes(8 * size))
+        self._size = size
+        self._next = 0
+        self._pending = 0
+
+    def append(self, value: float) -> None:
+        """Add a sample, overwriting the oldest one when full."""
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self._size
+        self._pending = min(self._pending + 1, self._size)
+
+    def drain(self) -> SampleStats | None:
+        """Return the aggregate of the pending samples and start a new window."""
+        if not self._pending:
+            return None
+        start = self._next - self._pending
+        if start >= 0:
+            window = self._values[start : self._next]
+        else:
+            window = self._values[start:] + self._values[: self._next]
+        self._pending = 0
+        return SampleStats(fmean(window), min(window), max(window), len(window))
+
+
+class DachsModbusSampler:
+    """Sample the fast values of one device between coordinator polls."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: DachsModbusApiClient,
+        interval: float,
+        size: int = SAMPLE_BUFFER_SIZE,
+    ) -> None:
+        """Initialize the sampler."""
+        self.hass = hass
+        self.api = client
+        self.interval = interval
+        self.rings = {key: SampleRing(size) for key in SAMPLED_KEYS}
+        self._sampling = False
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start sampling; return the stop callback."""
+        return async_track_time_interval(
+            self.hass, self._async_sample, timedelta(seconds=self.interval)
+        )
+
+    async def _async_sample(self, now=None) -> None:
+        """Read the sampled registers once."""
+        # A slow read must not queue up further reads behind the lock.
+        if self._sampling:
+            return
+        self._sampling = True
+        try:
+            values = await self.api.get_sample_data()
+        except ModbusException as e:
+            _LOGGER.debug("Sampling failed: %s", e)
+            return
+        finally:
+            self._sampling = False
+        for key, ring in self.rings.items():
+            if values.get(key) is not None:
+                ring.append(values[key])
+
+    @callback
+    def async_drain(self) -> dict[str, SampleStats]:
+        """Return the aggregates of the samples since the previous drain."""
+        stats = {}
+        for key, ring in self.rings.items():
+            if (aggregate := ring.drain()) is not None:
+                stats[key] = aggregate
+        return stats
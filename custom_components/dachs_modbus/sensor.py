@@ -1,5 +1,7 @@
 """Sensor entities for the Senertec Dachs Modbus integration."""
 
+from collections.abc import Callable
+from dataclasses import dataclass
 import logging
 
 from homeassistant.components.sensor import (
@@ -8,6 +10,7 @@ from homeassistant.components.sensor import (
     SensorEntityDescription,
     SensorStateClass,
 )
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.const import UnitOfTemperature, UnitOfPower, UnitOfTime, UnitOfEnergy
 
@@ -38,13 +41,6 @@ from .const import (
     MAX_INLET_TEMPERATURE,
     POWER_MODULATION,
     ACTIVE_GLT_CONNECTIONS,
-    DEVICE_TYPES,
-    UNIT_STATUS_MAP,
-    TYPE_OF_REQUEST_MAP,
-    LAST_SHUTDOWN_REASON_MAP,
-    HEATING_WATER_PUMP_STATUS_MAP,
-    CONTROL_STRATEGY_MAP,
-    POWER_MODULATION_MAP,
     SERIAL_NUMBER,
     NOMINAL_POWER,
     POWER_LEVEL,
@@ -53,186 +49,357 @@ from .const import (
     OPERATING_HOURS_POWER_LEVEL_2,
     OPERATING_HOURS_POWER_LEVEL_3,
     CURRENT_DISCHARGE_POWER,
+    THERMAL_POWER,
+    POWER_TO_HEAT_RATIO,
+    STARTS_PER_DAY,
+    AVERAGE_RUN_LENGTH,
+    BUFFER_STRATIFICATION,
+    MODBUS_ROUND_TRIP_TIME,
+    DECODE_TIME,
+    LOCK_WAIT_TIME,
+    CONSECUTIVE_FAILURES,
+    RECONNECTS,
+    POLL_DURATION_P50,
+    POLL_DURATION_P95,
+    POLL_DURATION_P99,
+    SCHEDULE_DRIFT,
 )
 from .coordinator import DachsModbusDataUpdateCoordinator
+from .derived import required_keys
+from .snapshot import snapshot_accessor
 
 _LOGGER = logging.getLogger(__name__)
 
+# Lifetime counters feed long-term statistics, which do not need every poll.
+COUNTER_PUBLISH_INTERVAL = 900
+
+
+@dataclass(frozen=True, kw_only=True)
+class DachsModbusSensorEntityDescription(SensorEntityDescription):
+    """Describes a Dachs sensor.
+
+    A new value is only published once it differs from the last published
+    value by at least the absolute deadband or the relative deadband
+    (a fraction of the last published value), whichever is larger. With a
+    publish interval, a changed value is also published once that many
+    seconds have passed since the last publication, and without a deadband
+    not before.
+    """
+
+    deadband: float | None = None
+    relative_deadband: float | None = None
+    publish_interval: float | None = None
+
+
 # Define your sensor types here as a tuple of SensorEntityDescription objects
-SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
-    SensorEntityDescription(
+SENSOR_TYPES: tuple[DachsModbusSensorEntityDescription, ...] = (
+    DachsModbusSensorEntityDescription(
         key=GLT_INTERFACE_VERSION,
         name="GLT Interface Version",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=DEVICE_TYPE,
         name="Device Type",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=UNIT_STATUS,
         name="Unit Status",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=ELECTRICAL_POWER,
         name="Electrical Power",
         native_unit_of_measurement=UnitOfPower.KILO_WATT,
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.05,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=TYPE_OF_REQUEST,
         name="Type of Request",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=RUNTIME_SINCE_LAST_START,
         name="Runtime Since Last Start",
         native_unit_of_measurement=UnitOfTime.HOURS,
         state_class=SensorStateClass.MEASUREMENT,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=LAST_SHUTDOWN_REASON,
         name="Last Shutdown Reason",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=HEATING_WATER_PUMP_STATUS,
         name="Heating Water Pump Status",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=CHP_OUTLET_TEMPERATURE,
         name="CHP Outlet Temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=CHP_INLET_TEMPERATURE,
         name="CHP Inlet Temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=TOTAL_OPERATING_HOURS,
         name="Total Operating Hours",
         native_unit_of_measurement=UnitOfTime.HOURS,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        publish_interval=COUNTER_PUBLISH_INTERVAL,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=TOTAL_STARTS,
         name="Total Starts",
         state_class=SensorStateClass.TOTAL_INCREASING,
+        publish_interval=COUNTER_PUBLISH_INTERVAL,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=GENERATED_ELECTRICAL_ENERGY,
         name="Generated Electrical Energy",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        publish_interval=COUNTER_PUBLISH_INTERVAL,
+        deadband=1,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=GENERATED_THERMAL_ENERGY,
         name="Generated Thermal Energy",
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        publish_interval=COUNTER_PUBLISH_INTERVAL,
+        deadband=1,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=OUTSIDE_TEMPERATURE,
         name="Outside Temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=BUFFER_TEMPERATURE_T1,
         name="Buffer Temperature T1",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=BUFFER_TEMPERATURE_T2,
         name="Buffer Temperature T2",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=BUFFER_TEMPERATURE_T3,
         name="Buffer Temperature T3",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=BUFFER_TEMPERATURE_T4,
         name="Buffer Temperature T4",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=CONTROL_STRATEGY,
         name="Control Strategy",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=MINIMUM_RUNTIME,
         name="Minimum Runtime",
         native_unit_of_measurement=UnitOfTime.MINUTES,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=MAX_INLET_TEMPERATURE,
         name="Max Inlet Temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=POWER_MODULATION,
         name="Power Modulation",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=SERIAL_NUMBER,
         name="Serial Number",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=NOMINAL_POWER,
         name="Nominal Power",
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.POWER,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=POWER_LEVEL,
         name="Power Level",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=MODULE_TYPE_DEFINITION,
         name="Module Type Definition",
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=OPERATING_HOURS_POWER_LEVEL_1,
         name="Operating Hours Power Level 1",
         native_unit_of_measurement=UnitOfTime.HOURS,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        publish_interval=COUNTER_PUBLISH_INTERVAL,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=OPERATING_HOURS_POWER_LEVEL_2,
         name="Operating Hours Power Level 2",
         native_unit_of_measurement=UnitOfTime.HOURS,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        publish_interval=COUNTER_PUBLISH_INTERVAL,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=OPERATING_HOURS_POWER_LEVEL_3,
         name="Operating Hours Power Level 3",
         native_unit_of_measurement=UnitOfTime.HOURS,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        publish_interval=COUNTER_PUBLISH_INTERVAL,
     ),
-    SensorEntityDescription(
+    DachsModbusSensorEntityDescription(
         key=CURRENT_DISCHARGE_POWER,
         name="Current Discharge Power",
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
+        deadband=50,
+    ),
+    DachsModbusSensorEntityDescription(
+        key=THERMAL_POWER,
+        name="Thermal Power",
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    DachsModbusSensorEntityDescription(
+        key=POWER_TO_HEAT_RATIO,
+        name="Power to Heat Ratio",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    DachsModbusSensorEntityDescription(
+        key=STARTS_PER_DAY,
+        name="Starts per Day",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    DachsModbusSensorEntityDescription(
+        key=AVERAGE_RUN_LENGTH,
+        name="Average Run Length",
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    DachsModbusSensorEntityDescription(
+        key=BUFFER_STRATIFICATION,
+        name="Buffer Stratification",
+        # A temperature difference; kelvin keeps it from being converted
+        # like an absolute temperature.
+        native_unit_of_measurement=UnitOfTemperature.KELVIN,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class DachsModbusDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor of the poll telemetry of a Dachs."""
+
+    value_fn: Callable[[DachsModbusDataUpdateCoordinator], float | int | None]
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    """Convert a duration in seconds to milliseconds."""
+    return None if seconds is None else seconds * 1000
+
+
+def _duration_description(key, name, value_fn):
+    """Describe a poll timing sensor, disabled by default."""
+    return DachsModbusDiagnosticSensorEntityDescription(
+        key=key,
+        name=name,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        suggested_display_precision=1,
+        value_fn=lambda coordinator: _milliseconds(value_fn(coordinator)),
+    )
+
+
+DIAGNOSTIC_SENSOR_TYPES: tuple[DachsModbusDiagnosticSensorEntityDescription, ...] = (
+    _duration_description(
+        MODBUS_ROUND_TRIP_TIME,
+        "Modbus Round Trip Time",
+        lambda coordinator: coordinator.api.telemetry.round_trip,
+    ),
+    _duration_description(
+        DECODE_TIME,
+        "Decode Time",
+        lambda coordinator: coordinator.api.telemetry.decode_time,
+    ),
+    _duration_description(
+        LOCK_WAIT_TIME,
+        "Lock Wait Time",
+        lambda coordinator: coordinator.api.telemetry.lock_wait,
+    ),
+    _duration_description(
+        POLL_DURATION_P50,
+        "Poll Duration P50",
+        lambda coordinator: coordinator.api.telemetry.percentile(0.50),
+    ),
+    _duration_description(
+        POLL_DURATION_P95,
+        "Poll Duration P95",
+        lambda coordinator: coordinator.api.telemetry.percentile(0.95),
+    ),
+    _duration_description(
+        POLL_DURATION_P99,
+        "Poll Duration P99",
+        lambda coordinator: coordinator.api.telemetry.percentile(0.99),
+    ),
+    _duration_description(
+        SCHEDULE_DRIFT,
+        "Schedule Drift",
+        lambda coordinator: coordinator.api.telemetry.schedule_drift,
+    ),
+    DachsModbusDiagnosticSensorEntityDescription(
+        key=CONSECUTIVE_FAILURES,
+        name="Consecutive Failures",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: coordinator.api.telemetry.consecutive_failures,
+    ),
+    DachsModbusDiagnosticSensorEntityDescription(
+        key=RECONNECTS,
+        name="Reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: coordinator.api.connection.reconnects,
     ),
 )
 
@@ -243,10 +410,31 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         config_entry.entry_id
     ]
 
+    coordinator.deadbands.update(
+        {
+            description.key: (description.deadband, description.relative_deadband)
+            for description in SENSOR_TYPES
+            if description.deadband or description.relative_deadband
+        }
+    )
+    coordinator.publish_intervals.update(
+        {
+            description.key: description.publish_interval
+            for description in SENSOR_TYPES
+            if description.publish_interval
+        }
+    )
+    supported_keys = coordinator.api.supported_keys
     entities = [
         DachsModbusSensor(coordinator, description, config_entry)
         for description in SENSOR_TYPES
+        if supported_keys is None
+        or supported_keys.issuperset(required_keys(description.key))
     ]
+    entities.extend(
+        DachsModbusDiagnosticSensor(coordinator, description, config_entry)
+        for description in DIAGNOSTIC_SENSOR_TYPES
+    )
     async_add_entities(entities)
 
 
@@ -255,13 +443,14 @@ class DachsModbusSensor(CoordinatorEntity, SensorEntity):
 
     def __init__(self, coordinator, entity_description, config_entry):
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=entity_description.key)
         self.entity_description = entity_description
         self._config_entry = config_entry
         self._attr_name = f"{SENSOR_PREFIX} {entity_description.name}"
         self._attr_unique_id = (
             f"{self._config_entry.entry_id}_{self.entity_description.key}"
         )
+        self._value = snapshot_accessor(entity_description.key)
 
     @property
     def device_info(self):
@@ -276,25 +465,55 @@ class DachsModbusSensor(CoordinatorEntity, SensorEntity):
 
     @property
     def native_value(self):
-        """Return the state of the sensor, handling potential missing data."""
-        value = self.coordinator.data.get(self.entity_description.key, None)
-        if value is None:
+        """Return the state of the sensor; enum values are already translated."""
+        return self._value(self.coordinator.data)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, any] | None:
+        """Return the aggregate of the samples taken since the previous poll."""
+        stats = self.coordinator.samples.get(self.entity_description.key)
+        if stats is None:
             return None
+        return {
+            "mean": round(stats.mean, 2),
+            "min": stats.min,
+            "max": stats.max,
+            "samples": stats.count,
+        }
+
 
-        key = self.entity_description.key
-        if key == DEVICE_TYPE:
-            return DEVICE_TYPES.get(value)
-        if key == UNIT_STATUS:
-            return UNIT_STATUS_MAP.get(value)
-        if key == TYPE_OF_REQUEST:
-            return TYPE_OF_REQUEST_MAP.get(value)
-        if key == LAST_SHUTDOWN_REASON:
-            return LAST_SHUTDOWN_REASON_MAP.get(value)
-        if key == HEATING_WATER_PUMP_STATUS:
-            return HEATING_WATER_PUMP_STATUS_MAP.get(value)
-        if key == CONTROL_STRATEGY:
-            return CONTROL_STRATEGY_MAP.get(value)
-        if key == POWER_MODULATION:
-            return POWER_MODULATION_MAP.get(value)
-
-        return value
+class DachsModbusDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Poll telemetry of a Senertec Dachs, updated after every poll."""
+
+    entity_description: DachsModbusDiagnosticSensorEntityDescription
+
+    def __init__(self, coordinator, entity_description, config_entry):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = entity_description
+        self._config_entry = config_entry
+        self._attr_name = f"{SENSOR_PREFIX} {entity_description.name}"
+        self._attr_unique_id = (
+            f"{self._config_entry.entry_id}_{self.entity_description.key}"
+        )
+
+    @property
+    def device_info(self):
+        """Return device information."""
+        return {
+            "identifiers": {(DOMAIN, self._config_entry.entry_id)},
+            "name": SENSOR_PREFIX,
+            "manufacturer": "Senertec",
+            "model": "Dachs",
+            "entry_type": "service",
+        }
+
+    @property
+    def available(self) -> bool:
+        """Stay available while polls fail, as that is when this matters."""
+        return True
+
+    @property
+    def native_value(self):
+        """Return the current statistic."""
+        return self.entity_description.value_fn(self.coordinator)
@@ -0,0 +1,64 @@
+"""Services for the Senertec Dachs Modbus integration."""
+
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from pymodbus.exceptions import ModbusException
+
+from .const import (
+    ATTR_ADDRESS,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_COUNT,
+    ATTR_REGISTER_TYPE,
+    DOMAIN,
+    MAX_READ_COUNT,
+    REGISTER_TYPE_HOLDING,
+    REGISTER_TYPE_INPUT,
+    SERVICE_READ_REGISTERS,
+)
+
+READ_REGISTERS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): str,
+        vol.Required(ATTR_REGISTER_TYPE): vol.In(
+            (REGISTER_TYPE_INPUT, REGISTER_TYPE_HOLDING)
+        ),
+        vol.Required(ATTR_ADDRESS): vol.All(int, vol.Range(min=0, max=0xFFFF)),
+        vol.Required(ATTR_COUNT): vol.All(int, vol.Range(min=1, max=MAX_READ_COUNT)),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_read_registers(call: ServiceCall) -> ServiceResponse:
+        """Return raw registers of a configured unit."""
+        entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+        coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+        if coordinator is None:
+            raise ServiceValidationError(f"No loaded Dachs entry {entry_id}")
+        try:
+            registers = await coordinator.api.read_registers(
+                call.data[ATTR_REGISTER_TYPE],
+                call.data[ATTR_ADDRESS],
+                call.data[ATTR_COUNT],
+            )
+        except ModbusException as e:
+            raise HomeAssistantError(f"Failed to read registers: {e}") from e
+        return {ATTR_ADDRESS: call.data[ATTR_ADDRESS], "registers": registers}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_READ_REGISTERS,
+        async_read_registers,
+        schema=READ_REGISTERS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
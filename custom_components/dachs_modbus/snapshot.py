@@ -0,0 +1,103 @@
+"""Poll snapshots for the Senertec Dachs Modbus integration."""
+
+from collections.abc import Callable, Iterator, Mapping
+from operator import attrgetter
+
+from .const import (
+    CONTROL_STRATEGY,
+    CONTROL_STRATEGY_MAP,
+    DERIVED_KEYS,
+    DEVICE_TYPE,
+    DEVICE_TYPES,
+    HEATING_WATER_PUMP_STATUS,
+    HEATING_WATER_PUMP_STATUS_MAP,
+    HOLDING_REGISTERS,
+    INPUT_REGISTERS,
+    LAST_SHUTDOWN_REASON,
+    LAST_SHUTDOWN_REASON_MAP,
+    POWER_MODULATION,
+    POWER_MODULATION_MAP,
+    TYPE_OF_REQUEST,
+    TYPE_OF_REQUEST_MAP,
+    UNIT_STATUS,
+    UNIT_STATUS_MAP,
+)
+
+# Enum codes are translated once per poll; unknown codes become None.
+ENUM_MAPS: dict[str, dict[int, str]] = {
+    DEVICE_TYPE: DEVICE_TYPES,
+    UNIT_STATUS: UNIT_STATUS_MAP,
+    TYPE_OF_REQUEST: TYPE_OF_REQUEST_MAP,
+    LAST_SHUTDOWN_REASON: LAST_SHUTDOWN_REASON_MAP,
+    HEATING_WATER_PUMP_STATUS: HEATING_WATER_PUMP_STATUS_MAP,
+    CONTROL_STRATEGY: CONTROL_STRATEGY_MAP,
+    POWER_MODULATION: POWER_MODULATION_MAP,
+}
+
+SNAPSHOT_KEYS = (
+    *(register.key for register in (*INPUT_REGISTERS, *HOLDING_REGISTERS)),
+    *DERIVED_KEYS,
+)
+
+
+class DachsSnapshot(Mapping):
+    """Immutable values of one poll with enum codes already translated.
+
+    Every register and derived metric is a slot; values that were not read
+    or could not be derived are None. The snapshot is also a read-only
+    mapping of key to value.
+    """
+
+    __slots__ = SNAPSHOT_KEYS
+
+    def __init__(self, values: Mapping[str, any]) -> None:
+        """Translate and store the decoded register values."""
+        for key in SNAPSHOT_KEYS:
+            value = values.get(key)
+            if value is not None and key in ENUM_MAPS:
+                value = ENUM_MAPS[key].get(value)
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key: str, value) -> None:
+        """Refuse changes, as listeners may still hold this snapshot."""
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key: str) -> None:
+        """Refuse changes, as listeners may still hold this snapshot."""
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, key: str):
+        """Return the value of a key."""
+        if key not in _SNAPSHOT_KEY_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over all keys."""
+        return iter(SNAPSHOT_KEYS)
+
+    def __len__(self) -> int:
+        """Return the number of keys."""
+        return len(SNAPSHOT_KEYS)
+
+    def __eq__(self, other) -> bool:
+        """Compare slot by slot with another snapshot."""
+        if isinstance(other, DachsSnapshot):
+            return _ALL_VALUES(self) == _ALL_VALUES(other)
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        """Return the values that were read."""
+        values = {key: value for key, value in self.items() if value is not None}
+        return f"{type(self).__name__}({values})"
+
+
+_SNAPSHOT_KEY_SET = frozenset(SNAPSHOT_KEYS)
+_ALL_VALUES = attrgetter(*SNAPSHOT_KEYS)
+
+
+def snapshot_accessor(key: str) -> Callable[[DachsSnapshot], any]:
+    """Return a function that reads key from a snapshot."""
+    return attrgetter(key)
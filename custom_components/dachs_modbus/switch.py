@@ -3,7 +3,9 @@
 import logging
 
 from homeassistant.components.switch import SwitchEntity, SwitchEntityDescription
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from pymodbus.exceptions import ModbusException
 
 from .const import DOMAIN, SENSOR_PREFIX, BLOCK_CHP_VIA_GLT
 from .coordinator import DachsModbusDataUpdateCoordinator
@@ -43,6 +45,8 @@ class DachsModbusSwitch(CoordinatorEntity, SwitchEntity):
         self._attr_unique_id = (
             f"{self._config_entry.entry_id}_{self.entity_description.key}"
         )
+        # Requested state shown until the write has been read back.
+        self._pending_state: bool | None = None
 
     @property
     def device_info(self):
@@ -58,14 +62,34 @@ class DachsModbusSwitch(CoordinatorEntity, SwitchEntity):
     @property
     def is_on(self) -> bool | None:
         """Return the state of the entity."""
-        return self.coordinator.data.get(self.entity_description.key)
+        if self._pending_state is not None:
+            return self._pending_state
+        value = self.coordinator.data.get(self.entity_description.key)
+        return None if value is None else bool(value)
 
     async def async_turn_on(self, **kwargs) -> None:
         """Turn the entity on."""
-        await self.hass.async_to_executor(self.coordinator.api.set_block_chp, True)
-        await self.coordinator.async_request_refresh()
+        await self._async_set_block(True)
 
     async def async_turn_off(self, **kwargs) -> None:
         """Turn the entity off."""
-        await self.hass.async_to_executor(self.coordinator.api.set_block_chp, False)
-        await self.coordinator.async_request_refresh()
+        await self._async_set_block(False)
+
+    async def _async_set_block(self, block: bool) -> None:
+        """Show the requested state at once, write it and read it back."""
+        self._pending_state = block
+        self.async_write_ha_state()
+        try:
+            try:
+                await self.coordinator.api.set_block_chp(block)
+            except ModbusException as e:
+                raise HomeAssistantError(f"Failed to write the CHP block: {e}") from e
+            try:
+                await self.coordinator.async_refresh_controls()
+            except ModbusException as e:
+                raise HomeAssistantError(
+                    f"Wrote the CHP block, but failed to read it back: {e}"
+                ) from e
+        finally:
+            self._pending_state = None
+            self.async_write_ha_state()
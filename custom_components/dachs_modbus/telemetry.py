@@ -0,0 +1,73 @@
+"""Poll telemetry for the Senertec Dachs Modbus integration."""
+
+from collections import deque
+
+POLL_WINDOW = 100
+
+
+class DachsModbusTelemetry:
+    """Timing and failure statistics of the polls of one device.
+
+    The API client adds the lock wait, Modbus round-trip and decode time of
+    each request to the running poll; the coordinator closes the poll with
+    its total duration. Durations are in seconds.
+    """
+
+    def __init__(self, window: int = POLL_WINDOW) -> None:
+        """Initialize the statistics."""
+        self.poll_durations: deque[float] = deque(maxlen=window)
+        self.lock_wait: float | None = None
+        self.round_trip: float | None = None
+        self.decode_time: float | None = None
+        self.polls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        # Seconds the latest scheduled poll started after its planned time.
+        self.schedule_drift: float | None = None
+        self._lock_wait = 0.0
+        self._round_trip = 0.0
+        self._decode_time = 0.0
+
+    def record_request(
+        self, lock_wait: float, round_trip: float, decode_time: float
+    ) -> None:
+        """Add the timings of one request to the running poll."""
+        self._lock_wait += lock_wait
+        self._round_trip += round_trip
+        self._decode_time += decode_time
+
+    def record_poll(self, duration: float, success: bool) -> None:
+        """Close the running poll."""
+        self.polls += 1
+        if success:
+            self.consecutive_failures = 0
+            self.poll_durations.append(duration)
+            self.lock_wait = self._lock_wait
+            self.round_trip = self._round_trip
+            self.decode_time = self._decode_time
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+        self._lock_wait = self._round_trip = self._decode_time = 0.0
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return a nearest-rank percentile of the recent poll durations."""
+        if not self.poll_durations:
+            return None
+        ordered = sorted(self.poll_durations)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def as_dict(self) -> dict[str, any]:
+        """Return the statistics for diagnostics."""
+        return {
+            "polls": self.polls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "lock_wait": self.lock_wait,
+            "round_trip": self.round_trip,
+            "decode_time": self.decode_time,
+            "poll_duration_p50": self.percentile(0.50),
+            "poll_duration_p95": self.percentile(0.95),
+            "poll_duration_p99": self.percentile(0.99),
+            "schedule_drift": self.schedule_drift,
+        }
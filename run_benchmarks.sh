@@ -0,0 +1,4 @@
+#!/bin/bash
+
+pip install -r requirements.txt
+pytest tests/benchmarks -o python_files="bench_*.py" "$@"
@@ -0,0 +1,47 @@
+"""Benchmarks of the register decoder."""
+
+import time
+
+from custom_components.dachs_modbus.decoder import (
+    INPUT_REGISTER_DECODER,
+    TIER_READ_PLANS,
+)
+from tests.simulator import DachsSimulator
+
+ITERATIONS = 20000
+
+
+def _time(function, *args) -> list[float]:
+    """Return the duration of each call of function."""
+    samples = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        function(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def test_decode_full_block(record_benchmark):
+    """Decode the full 84-register block from a register list."""
+    registers = DachsSimulator().input_registers()
+
+    record_benchmark(
+        "decode_full_block",
+        _time(INPUT_REGISTER_DECODER.decode_registers, registers),
+    )
+
+
+def test_decode_tiers(record_benchmark):
+    """Decode each polling tier from its read spans."""
+    registers = DachsSimulator().input_registers()
+    for tier, plan in TIER_READ_PLANS.items():
+        spans = [
+            (decoder, registers[decoder.start : decoder.start + decoder.count])
+            for decoder in plan
+        ]
+
+        def decode():
+            for decoder, span in spans:
+                decoder.decode_registers(span)
+
+        record_benchmark(f"decode_tier_{tier}", _time(decode))
@@ -0,0 +1,150 @@
+"""Benchmarks of poll round trips and coordinator-to-entity fan-out."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PORT,
+    CONF_SCAN_INTERVAL,
+    EVENT_STATE_CHANGED,
+)
+from homeassistant.core import HomeAssistant
+
+from custom_components.dachs_modbus.api import DachsModbusApiClient
+from custom_components.dachs_modbus.const import (
+    CONF_GLT_PIN,
+    DOMAIN,
+    ELECTRICAL_POWER,
+    INPUT_REGISTER_COUNT,
+    INPUT_REGISTERS,
+)
+from custom_components.dachs_modbus.coordinator import (
+    DachsModbusDataUpdateCoordinator,
+)
+from custom_components.dachs_modbus.decoder import INPUT_REGISTER_DECODER
+from custom_components.dachs_modbus.telemetry import DachsModbusTelemetry
+from tests.simulator import TEMPERATURE_KEYS, DachsSimulator, encode_registers
+
+POLLS = 200
+CYCLES = 20
+
+
+@pytest.fixture
+async def simulator(socket_enabled):
+    """Run a simulated unit on a local port."""
+    async with DachsSimulator() as simulator:
+        yield simulator
+
+
+async def test_poll_round_trip(hass: HomeAssistant, simulator, record_benchmark):
+    """Time full-block polls and tiered coordinator refreshes end to end."""
+    api = DachsModbusApiClient("127.0.0.1", simulator.port, "1234")
+    coordinator = DachsModbusDataUpdateCoordinator(hass, api, 60)
+    await api.get_data()
+
+    samples = []
+    for _ in range(POLLS):
+        start = time.perf_counter()
+        await api.get_data()
+        samples.append(time.perf_counter() - start)
+    record_benchmark("poll_full_block", samples)
+
+    samples = []
+    for _ in range(POLLS):
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        samples.append(time.perf_counter() - start)
+    record_benchmark("poll_coordinator_refresh", samples)
+
+    await coordinator.async_shutdown()
+    api.close()
+
+
+class _StubApiClient:
+    """API client that returns in-memory values without I/O."""
+
+    values: dict[str, any] = {}
+
+    def __init__(self, **kwargs) -> None:
+        self.connection = kwargs["connection"]
+        self.telemetry = DachsModbusTelemetry()
+        self.supported_keys = None
+        self.power_setpoint = None
+
+    async def get_tier_data(self, tier: str) -> dict[str, any]:
+        return {
+            register.key: self.values[register.key]
+            for register in INPUT_REGISTERS
+            if register.tier == tier
+        }
+
+    async def get_control_data(self) -> dict[str, any]:
+        return {}
+
+    async def probe_input_ranges(self) -> list[tuple[int, int]]:
+        return [(0, INPUT_REGISTER_COUNT)]
+
+    def set_supported_keys(self, keys: frozenset[str] | None) -> None:
+        self.supported_keys = keys
+
+    def set_read_keys(self, keys: frozenset[str] | None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.mark.parametrize("devices", [1, 10, 50])
+async def test_entity_fan_out(hass: HomeAssistant, devices, record_benchmark):
+    """Time a refresh of all devices until every entity state is written."""
+    simulator = DachsSimulator()
+    _StubApiClient.values = INPUT_REGISTER_DECODER.decode_registers(
+        simulator.input_registers()
+    )
+    entries = []
+    with patch("custom_components.dachs_modbus.DachsModbusApiClient", _StubApiClient):
+        for device in range(devices):
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                data={
+                    CONF_HOST: f"10.0.0.{device}",
+                    CONF_PORT: 502,
+                    CONF_GLT_PIN: "1234",
+                    CONF_SCAN_INTERVAL: 3600,
+                },
+            )
+            entry.add_to_hass(hass)
+            await hass.config_entries.async_setup(entry.entry_id)
+            entries.append(entry)
+    await hass.async_block_till_done()
+    coordinators = [hass.data[DOMAIN][entry.entry_id] for entry in entries]
+
+    state_changes = []
+    hass.bus.async_listen(EVENT_STATE_CHANGED, state_changes.append)
+    samples = []
+    for cycle in range(CYCLES):
+        # Move every process value well past its deadband.
+        simulator.values[ELECTRICAL_POWER] = 1.0 + cycle % 4
+        for key in TEMPERATURE_KEYS:
+            simulator.values[key] += 1 if cycle % 2 else -1
+        _StubApiClient.values = INPUT_REGISTER_DECODER.decode_registers(
+            encode_registers(simulator.values)
+        )
+        start = time.perf_counter()
+        for coordinator in coordinators:
+            await coordinator.async_refresh()
+        samples.append(time.perf_counter() - start)
+    await hass.async_block_till_done()
+
+    record_benchmark(
+        f"entity_fan_out_{devices}_devices",
+        samples,
+        devices=devices,
+        state_writes_per_cycle=len(state_changes) / CYCLES,
+    )
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
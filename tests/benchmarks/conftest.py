@@ -0,0 +1,69 @@
+"""Fixtures for the Dachs Modbus benchmarks.
+
+Run with ./run_benchmarks.sh. Results are written as JSON to the path in
+DACHS_BENCHMARK_OUTPUT (default bench_output.json) so that they can be
+compared across releases.
+"""
+
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import time
+
+import pytest
+
+MANIFEST = Path(__file__).parents[2] / "custom_components/dachs_modbus/manifest.json"
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    """Return a nearest-rank percentile of sorted samples."""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Summarize durations in seconds as milliseconds."""
+    ordered = sorted(samples)
+    mean = statistics.fmean(ordered)
+    return {
+        "count": len(ordered),
+        "ops_per_s": 1 / mean if mean else None,
+        "mean_ms": mean * 1000,
+        "min_ms": ordered[0] * 1000,
+        "p50_ms": _percentile(ordered, 0.50) * 1000,
+        "p95_ms": _percentile(ordered, 0.95) * 1000,
+        "p99_ms": _percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+@pytest.fixture(scope="session")
+def benchmark_results():
+    """Collect results and write them once all benchmarks ran."""
+    results = {}
+    yield results
+    output = Path(os.environ.get("DACHS_BENCHMARK_OUTPUT", "bench_output.json"))
+    output.write_text(
+        json.dumps(
+            {
+                "version": json.loads(MANIFEST.read_text())["version"],
+                "python": platform.python_version(),
+                "timestamp": time.time(),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+@pytest.fixture
+def record_benchmark(benchmark_results):
+    """Return a function that stores the summary of a benchmark."""
+
+    def record(name: str, samples: list[float], **extra) -> dict:
+        result = {**summarize(samples), **extra}
+        benchmark_results[name] = result
+        return result
+
+    return record
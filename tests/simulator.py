@@ -0,0 +1,274 @@
+"""Local Modbus TCP server that emulates the Dachs GLT register layout.
+
+The simulator serves input registers 8000-8083 and holding registers
+8300-8302 from the register table in const.py, so the real decode path and
+Modbus I/O of the integration can be exercised without a CHP. A Scenario
+describes the unit (running or stopped, ramping power, drifting
+temperatures) and the transport (latency, injected errors).
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import random
+import struct
+import time
+
+from custom_components.dachs_modbus.const import (
+    BUFFER_TEMPERATURE_T1,
+    BUFFER_TEMPERATURE_T2,
+    BUFFER_TEMPERATURE_T3,
+    BUFFER_TEMPERATURE_T4,
+    CHP_INLET_TEMPERATURE,
+    CHP_OUTLET_TEMPERATURE,
+    DATA_TYPE_INT32,
+    DATA_TYPE_STRING,
+    DEVICE_TYPE,
+    ELECTRICAL_POWER,
+    GLT_INTERFACE_VERSION,
+    HOLDING_REGISTER_COUNT,
+    HOLDING_REGISTER_START,
+    INPUT_REGISTER_COUNT,
+    INPUT_REGISTER_START,
+    INPUT_REGISTERS,
+    NOMINAL_POWER,
+    SERIAL_NUMBER,
+    TOTAL_OPERATING_HOURS,
+    TOTAL_STARTS,
+    UNIT_STATUS,
+)
+
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+SLAVE_DEVICE_FAILURE = 0x04
+
+ERROR_EXCEPTION = "exception"
+ERROR_TIMEOUT = "timeout"
+ERROR_DISCONNECT = "disconnect"
+
+STATUS_OFF = 0
+STATUS_RUNNING = 2
+
+TEMPERATURE_KEYS = (
+    CHP_OUTLET_TEMPERATURE,
+    CHP_INLET_TEMPERATURE,
+    BUFFER_TEMPERATURE_T1,
+    BUFFER_TEMPERATURE_T2,
+    BUFFER_TEMPERATURE_T3,
+    BUFFER_TEMPERATURE_T4,
+)
+
+_HEADER = struct.Struct(">HHHB")
+_REGISTERS = {register.key: register for register in INPUT_REGISTERS}
+
+
+@dataclass
+class Scenario:
+    """Behaviour of the simulated unit and its network link.
+
+    Power ramps towards max_power at power_ramp kW/s while the unit runs,
+    temperatures change by temperature_drift °C/s, every request is
+    delayed by latency seconds and answered with error_kind at error_rate.
+    Older firmware serves fewer than input_register_count registers.
+    """
+
+    running: bool = True
+    electrical_power: float = 5.5
+    max_power: float = 5.5
+    power_ramp: float = 0.0
+    temperature_drift: float = 0.0
+    latency: float = 0.0
+    error_rate: float = 0.0
+    error_kind: str = ERROR_EXCEPTION
+    values: dict[str, any] = field(default_factory=dict)
+    input_register_count: int = INPUT_REGISTER_COUNT
+
+
+RUNNING = Scenario()
+STOPPED = Scenario(running=False, electrical_power=0.0)
+STARTING = Scenario(electrical_power=0.0, power_ramp=0.5)
+COOLING_DOWN = Scenario(running=False, electrical_power=0.0, temperature_drift=-0.1)
+
+
+def encode_registers(values: dict[str, any]) -> list[int]:
+    """Encode decoded values into the input register block."""
+    registers = [0] * INPUT_REGISTER_COUNT
+    for key, value in values.items():
+        register = _REGISTERS[key]
+        if register.data_type == DATA_TYPE_STRING:
+            raw = value.encode("utf-8").ljust(register.length * 2, b"\x00")
+            words = struct.unpack(f">{register.length}H", raw)
+        elif register.data_type == DATA_TYPE_INT32:
+            raw = round(value * register.scale) & 0xFFFFFFFF
+            words = (raw >> 16, raw & 0xFFFF)
+        else:
+            words = (round(value * register.scale) & 0xFFFF,)
+        registers[register.offset : register.offset + len(words)] = words
+    return registers
+
+
+class DachsSimulator:
+    """Modbus TCP server for a simulated Dachs unit, on any unit id."""
+
+    def __init__(self, scenario: Scenario = RUNNING, seed: int = 0) -> None:
+        """Initialize the simulator."""
+        self.scenario = scenario
+        self.values: dict[str, any] = {
+            GLT_INTERFACE_VERSION: 1,
+            DEVICE_TYPE: 2601,
+            SERIAL_NUMBER: "5512345678",
+            NOMINAL_POWER: 5500,
+            TOTAL_OPERATING_HOURS: 12000,
+            TOTAL_STARTS: 3400,
+            CHP_OUTLET_TEMPERATURE: 80.0,
+            CHP_INLET_TEMPERATURE: 60.0,
+            BUFFER_TEMPERATURE_T1: 70.0,
+            BUFFER_TEMPERATURE_T2: 60.0,
+            BUFFER_TEMPERATURE_T3: 50.0,
+            BUFFER_TEMPERATURE_T4: 40.0,
+        }
+        self.values.update(scenario.values)
+        self.values[ELECTRICAL_POWER] = scenario.electrical_power
+        self.holding_registers = [0] * HOLDING_REGISTER_COUNT
+        self.requests = 0
+        # Unit ids whose requests are never answered, as by a gateway whose
+        # unit behind it is down.
+        self.silent_units: set[int] = set()
+        self.port: int | None = None
+        self._random = random.Random(seed)
+        self._pending_errors: list[str] = []
+        self._last_advance = time.monotonic()
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving and return the bound port."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        """Stop serving and drop all client connections."""
+        for writer in list(self._connections):
+            writer.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        """Start the simulator."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Stop the simulator."""
+        await self.stop()
+
+    def inject_errors(self, count: int = 1, kind: str = ERROR_EXCEPTION) -> None:
+        """Fail the next count requests."""
+        self._pending_errors.extend([kind] * count)
+
+    def advance(self, seconds: float) -> None:
+        """Apply the scenario dynamics for the given time."""
+        scenario = self.scenario
+        blocked = self.holding_registers[2] == 1
+        running = scenario.running and not blocked
+        values = self.values
+        if running:
+            power = values[ELECTRICAL_POWER] + scenario.power_ramp * seconds
+            values[ELECTRICAL_POWER] = min(power, scenario.max_power)
+        else:
+            values[ELECTRICAL_POWER] = 0.0
+        values[UNIT_STATUS] = STATUS_RUNNING if running else STATUS_OFF
+        if scenario.temperature_drift:
+            for key in TEMPERATURE_KEYS:
+                values[key] += scenario.temperature_drift * seconds
+
+    def input_registers(self) -> list[int]:
+        """Return the current input register block."""
+        now = time.monotonic()
+        self.advance(now - self._last_advance)
+        self._last_advance = now
+        registers = encode_registers(self.values)
+        return registers[: self.scenario.input_register_count]
+
+    def _next_error(self) -> str | None:
+        """Return the error to inject into the current request, if any."""
+        if self._pending_errors:
+            return self._pending_errors.pop(0)
+        if (
+            self.scenario.error_rate
+            and self._random.random() < self.scenario.error_rate
+        ):
+            return self.scenario.error_kind
+        return None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve Modbus TCP requests of one client connection."""
+        self._connections.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(_HEADER.size)
+                transaction, protocol, length, unit = _HEADER.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+                if self.scenario.latency:
+                    await asyncio.sleep(self.scenario.latency)
+                if unit in self.silent_units:
+                    continue
+                error = self._next_error()
+                if error == ERROR_DISCONNECT:
+                    break
+                if error == ERROR_TIMEOUT:
+                    continue
+                if error == ERROR_EXCEPTION:
+                    response = bytes((pdu[0] | 0x80, SLAVE_DEVICE_FAILURE))
+                else:
+                    response = self._process(pdu)
+                writer.write(
+                    _HEADER.pack(transaction, protocol, len(response) + 1, unit)
+                    + response
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def _process(self, pdu: bytes) -> bytes:
+        """Answer a request PDU."""
+        function = pdu[0]
+        if function in (READ_INPUT_REGISTERS, READ_HOLDING_REGISTERS):
+            address, count = struct.unpack_from(">HH", pdu, 1)
+            if function == READ_INPUT_REGISTERS:
+                block, start = self.input_registers(), INPUT_REGISTER_START
+            else:
+                block, start = self.holding_registers, HOLDING_REGISTER_START
+            offset = address - start
+            if offset < 0 or offset + count > len(block):
+                return bytes((function | 0x80, ILLEGAL_DATA_ADDRESS))
+            words = block[offset : offset + count]
+            return struct.pack(f">BB{count}H", function, count * 2, *words)
+        if function in (WRITE_SINGLE_REGISTER, WRITE_MULTIPLE_REGISTERS):
+            if function == WRITE_SINGLE_REGISTER:
+                address, value = struct.unpack_from(">HH", pdu, 1)
+                words = (value,)
+            else:
+                address, count = struct.unpack_from(">HH", pdu, 1)
+                words = struct.unpack_from(f">{count}H", pdu, 6)
+            offset = address - HOLDING_REGISTER_START
+            if offset < 0 or offset + len(words) > HOLDING_REGISTER_COUNT:
+                return bytes((function | 0x80, ILLEGAL_DATA_ADDRESS))
+            self.holding_registers[offset : offset + len(words)] = words
+            if function == WRITE_SINGLE_REGISTER:
+                return pdu[:5]
+            return struct.pack(">BHH", function, address, len(words))
+        return bytes((function | 0x80, ILLEGAL_FUNCTION))
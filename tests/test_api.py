@@ -0,0 +1,186 @@
+"""Unit tests for the Dachs Modbus API client."""
+
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from custom_components.dachs_modbus.api import DachsModbusApiClient
+from custom_components.dachs_modbus.breaker import CircuitOpenError
+from custom_components.dachs_modbus.connection import (
+    async_get_connection,
+    async_release_connection,
+)
+from custom_components.dachs_modbus.const import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN,
+    CIRCUIT_RESET_TIMEOUT,
+    CONNECTION_STATE_BACKOFF,
+    CONNECTION_STATE_CONNECTED,
+    CURRENT_DISCHARGE_POWER,
+    TIER_FAST,
+    UNIT_STATUS,
+)
+
+MOCK_HOST = "1.2.3.4"
+MOCK_PORT = 502
+MOCK_GLT_PIN = "1234"
+
+
+@pytest.fixture
+def mock_modbus_client():
+    """Mock the pymodbus AsyncModbusTcpClient."""
+    with patch(
+        "custom_components.dachs_modbus.connection.AsyncModbusTcpClient"
+    ) as mock_client_class:
+        client = mock_client_class.return_value
+        client.connected = True
+        client.connect = AsyncMock(return_value=True)
+        client.write_registers = AsyncMock(
+            return_value=MagicMock(isError=MagicMock(return_value=False))
+        )
+        client.read_input_registers = AsyncMock()
+        client.close = MagicMock()
+        yield client
+
+
+def _writes(mock_modbus_client) -> list[tuple[int, list[int]]]:
+    """Return the address and values of each write request."""
+    return [
+        (c.kwargs["address"], c.kwargs["values"])
+        for c in mock_modbus_client.write_registers.await_args_list
+    ]
+
+
+async def test_set_electrical_power(mock_modbus_client):
+    """Test that the PIN and the setpoint go out in one request."""
+    api = DachsModbusApiClient(MOCK_HOST, MOCK_PORT, MOCK_GLT_PIN)
+
+    await api.set_electrical_power(2500)
+    await api.set_block_chp(True)
+
+    assert _writes(mock_modbus_client) == [
+        (8300, [1234, 2500]),
+        (8300, [1234, 2500, 1]),
+    ]
+    api.close()
+    mock_modbus_client.close.assert_called_once()
+
+
+async def test_connect_failure(mock_modbus_client):
+    """Test that a failed connect is reported as ConnectionException."""
+    mock_modbus_client.connected = False
+    mock_modbus_client.connect.return_value = False
+    api = DachsModbusApiClient(MOCK_HOST, MOCK_PORT, MOCK_GLT_PIN)
+
+    with pytest.raises(ConnectionException):
+        await api.get_data()
+    mock_modbus_client.read_input_registers.assert_not_awaited()
+
+
+async def test_reconnect_backoff(mock_modbus_client):
+    """Test that failed connects back off and reconnects are counted."""
+    mock_modbus_client.connected = False
+    mock_modbus_client.connect.return_value = False
+    api = DachsModbusApiClient(MOCK_HOST, MOCK_PORT, MOCK_GLT_PIN)
+
+    with pytest.raises(ConnectionException):
+        await api.get_data()
+    assert api.connection.state == CONNECTION_STATE_BACKOFF
+    # A second poll inside the backoff window does not hit the network.
+    with pytest.raises(ConnectionException):
+        await api.get_data()
+    mock_modbus_client.connect.assert_awaited_once()
+
+    with patch("custom_components.dachs_modbus.connection.time.monotonic") as now:
+        now.return_value = 1e9
+        mock_modbus_client.connect.return_value = True
+        await api.set_block_chp(True)
+    assert api.connection.state == CONNECTION_STATE_CONNECTED
+    assert api.connection.consecutive_failures == 0
+    api.close()
+
+
+async def test_circuit_breaker(mock_modbus_client):
+    """Test that writes fail fast while a dead unit's circuit is open."""
+    mock_modbus_client.read_holding_registers = AsyncMock(
+        side_effect=ModbusIOException("No response")
+    )
+    api = DachsModbusApiClient(MOCK_HOST, MOCK_PORT, MOCK_GLT_PIN)
+    api.connection.configure(timeout=1, retries=0)
+
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(ModbusIOException):
+            await api.get_control_data()
+    assert api.breaker.state == CIRCUIT_OPEN
+    with pytest.raises(CircuitOpenError):
+        await api.get_control_data()
+    with pytest.raises(CircuitOpenError):
+        await api.set_electrical_power(2500)
+    mock_modbus_client.write_registers.assert_not_awaited()
+
+    # Once the reset timeout has passed, a read probes the unit.
+    mock_modbus_client.read_holding_registers.side_effect = None
+    mock_modbus_client.read_holding_registers.return_value = MagicMock(
+        isError=MagicMock(return_value=False), registers=[1234, 2500, 0]
+    )
+    with patch("custom_components.dachs_modbus.breaker.time") as breaker_time:
+        breaker_time.monotonic.return_value = time.monotonic() + CIRCUIT_RESET_TIMEOUT
+        await api.get_control_data()
+    assert api.breaker.state == CIRCUIT_CLOSED
+    await api.set_electrical_power(2500)
+    api.close()
+
+
+def test_set_max_gap(mock_modbus_client):
+    """Test that a changed gap threshold rebuilds the read plans."""
+    api = DachsModbusApiClient(MOCK_HOST, MOCK_PORT, MOCK_GLT_PIN)
+    api.set_read_keys(frozenset({UNIT_STATUS, CURRENT_DISCHARGE_POWER}))
+
+    api.set_max_gap(0)
+    assert [(d.start, d.count) for d in api._read_plans[TIER_FAST]] == [
+        (13, 1),
+        (56, 1),
+    ]
+    api.set_max_gap(64)
+    assert [(d.start, d.count) for d in api._read_plans[TIER_FAST]] == [(13, 44)]
+    api.close()
+
+
+async def test_shared_connection(hass, mock_modbus_client):
+    """Test that units behind one gateway share and release one session."""
+    first = async_get_connection(hass, MOCK_HOST, MOCK_PORT, 1)
+    second = async_get_connection(hass, MOCK_HOST, MOCK_PORT, 2)
+    assert first is second
+    mock_modbus_client.connected = False
+    async with first.lock:
+        await first.ensure_connected()
+    # The keepalive is a background task that Home Assistant stops.
+    assert first._keepalive_task in hass._background_tasks
+    mock_modbus_client.connected = True
+
+    api_1 = DachsModbusApiClient(MOCK_HOST, MOCK_PORT, MOCK_GLT_PIN, 1, first)
+    api_2 = DachsModbusApiClient(MOCK_HOST, MOCK_PORT, MOCK_GLT_PIN, 2, second)
+    await api_1.set_block_chp(True)
+    await api_2.set_block_chp(True)
+    units = [
+        c.kwargs.get("slave", c.kwargs.get("device_id"))
+        for c in mock_modbus_client.write_registers.await_args_list
+    ]
+    assert units == [1, 1, 2, 2]
+    # Without a known setpoint the PIN and the block flag are separate writes.
+    assert _writes(mock_modbus_client)[:2] == [(8300, [1234]), (8302, [1])]
+
+    assert first.unit_ids == [1, 2]
+
+    api_1.close()
+    async_release_connection(hass, first, 1)
+    mock_modbus_client.close.assert_not_called()
+    # The keepalive probes the units still using the session.
+    assert second.unit_ids == [2]
+    api_2.close()
+    async_release_connection(hass, second, 2)
+    mock_modbus_client.close.assert_called_once()
@@ -0,0 +1,67 @@
+"""Unit tests for the Dachs Modbus circuit breaker."""
+
+import pytest
+from unittest.mock import patch
+
+from custom_components.dachs_modbus.breaker import (
+    CircuitOpenError,
+    DachsCircuitBreaker,
+)
+from custom_components.dachs_modbus.const import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+)
+
+
+@pytest.fixture
+def now():
+    """Control the clock of the breaker."""
+    with patch("custom_components.dachs_modbus.breaker.time") as breaker_time:
+        breaker_time.monotonic.return_value = 1000.0
+        yield breaker_time.monotonic
+
+
+def test_open_after_threshold(now):
+    """Test that the circuit opens after failures in a row."""
+    breaker = DachsCircuitBreaker("unit", failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.trips == 1
+    assert breaker.retry_in == 10
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(probe=True)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(probe=False)
+
+
+def test_half_open_probe(now):
+    """Test that one read probes the open circuit and backs off on failure."""
+    breaker = DachsCircuitBreaker(
+        "unit", failure_threshold=1, reset_timeout=10, reset_timeout_max=15
+    )
+    breaker.record_failure()
+
+    now.return_value += 10
+    breaker.before_request(probe=True)
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    # Only the probe goes out, and writes wait for the circuit to close.
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(probe=True)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(probe=False)
+
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.retry_in == 15
+
+    now.return_value += 15
+    breaker.before_request(probe=True)
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    breaker.before_request(probe=False)
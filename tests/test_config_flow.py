@@ -1,4 +1,5 @@
 import pytest
+import voluptuous as vol
 from unittest.mock import patch
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
@@ -7,12 +8,28 @@ from homeassistant.core import HomeAssistant
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
 from homeassistant.data_entry_flow import FlowResultType
 
-from custom_components.dachs_modbus.const import DOMAIN, CONF_GLT_PIN
+from custom_components.dachs_modbus.const import (
+    DOMAIN,
+    CONF_COUNTER_INTERVAL,
+    CONF_FLEET_CONCURRENCY,
+    CONF_GLT_PIN,
+    CONF_READ_SPAN_MAX_GAP,
+    CONF_RETRIES,
+    CONF_SAMPLE_INTERVAL,
+    CONF_TIMEOUT,
+    CONF_UNIT_ID,
+    DEFAULT_TIMEOUT,
+    DEFAULT_UNIT_ID,
+    READ_SPAN_MAX_GAP,
+    DEVICE_TYPE,
+    SERIAL_NUMBER,
+)
 
 MOCK_HOST = "1.2.3.4"
 MOCK_PORT = 502
 MOCK_GLT_PIN = "1234"
 MOCK_SCAN_INTERVAL = 60
+MOCK_IDENTITY = {DEVICE_TYPE: 2601, SERIAL_NUMBER: "5512345678"}
 
 
 @pytest.fixture(autouse=True)
@@ -24,6 +41,16 @@ def mock_setup_entry():
         yield mock_setup
 
 
+@pytest.fixture(autouse=True)
+def mock_identify():
+    """Mock the identity read of the device."""
+    with patch(
+        "custom_components.dachs_modbus.config_flow.async_identify",
+        return_value=MOCK_IDENTITY,
+    ) as mock_identify:
+        yield mock_identify
+
+
 async def test_config_flow_user_step(hass: HomeAssistant):
     """Test the user config flow."""
     result = await hass.config_entries.flow.async_init(
@@ -50,6 +77,7 @@ async def test_config_flow_user_step(hass: HomeAssistant):
     assert result2["data"] == {
         CONF_HOST: MOCK_HOST,
         CONF_PORT: MOCK_PORT,
+        CONF_UNIT_ID: DEFAULT_UNIT_ID,
         CONF_GLT_PIN: MOCK_GLT_PIN,
         CONF_SCAN_INTERVAL: MOCK_SCAN_INTERVAL,
     }
@@ -86,3 +114,183 @@ async def test_config_flow_already_configured(hass: HomeAssistant):
     )
     assert result2["type"] == FlowResultType.ABORT
     assert result2["reason"] == "already_configured"
+
+
+async def test_config_flow_second_unit_on_host(hass: HomeAssistant):
+    """Test that another unit id behind the same host can be added."""
+    MockConfigEntry(domain=DOMAIN, unique_id=MOCK_HOST).add_to_hass(hass)
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result2 = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            CONF_HOST: MOCK_HOST,
+            CONF_PORT: MOCK_PORT,
+            CONF_UNIT_ID: 2,
+            CONF_GLT_PIN: MOCK_GLT_PIN,
+            CONF_SCAN_INTERVAL: MOCK_SCAN_INTERVAL,
+        },
+    )
+    assert result2["type"] == FlowResultType.CREATE_ENTRY
+    assert result2["result"].unique_id == f"{MOCK_HOST}_2"
+
+
+async def test_config_flow_broadcast_unit_id(hass: HomeAssistant):
+    """Test that the broadcast unit id 0 is refused."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with pytest.raises(vol.Invalid):
+        result["data_schema"](
+            {
+                CONF_HOST: MOCK_HOST,
+                CONF_PORT: MOCK_PORT,
+                CONF_UNIT_ID: 0,
+                CONF_GLT_PIN: MOCK_GLT_PIN,
+                CONF_SCAN_INTERVAL: MOCK_SCAN_INTERVAL,
+            }
+        )
+
+
+async def test_config_flow_cannot_connect(hass: HomeAssistant, mock_identify):
+    """Test that an address without a Dachs is rejected."""
+    mock_identify.return_value = None
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result2 = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            CONF_HOST: MOCK_HOST,
+            CONF_PORT: MOCK_PORT,
+            CONF_GLT_PIN: MOCK_GLT_PIN,
+            CONF_SCAN_INTERVAL: MOCK_SCAN_INTERVAL,
+        },
+    )
+    assert result2["type"] == FlowResultType.FORM
+    assert result2["errors"] == {"base": "cannot_connect"}
+    mock_identify.assert_awaited_once_with(MOCK_HOST, MOCK_PORT, DEFAULT_UNIT_ID)
+
+
+async def test_config_flow_subnet_scan(hass: HomeAssistant):
+    """Test picking a unit found by scanning a subnet."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch(
+        "custom_components.dachs_modbus.config_flow.async_scan",
+        return_value={MOCK_HOST: MOCK_IDENTITY},
+    ) as mock_scan:
+        result2 = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {
+                CONF_HOST: "1.2.3.0/24",
+                CONF_PORT: MOCK_PORT,
+                CONF_GLT_PIN: MOCK_GLT_PIN,
+                CONF_SCAN_INTERVAL: MOCK_SCAN_INTERVAL,
+            },
+        )
+    assert str(mock_scan.call_args.args[0]) == "1.2.3.0/24"
+    assert result2["type"] == FlowResultType.FORM
+    assert result2["step_id"] == "pick"
+
+    result3 = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_HOST: MOCK_HOST}
+    )
+    assert result3["type"] == FlowResultType.CREATE_ENTRY
+    assert result3["data"][CONF_HOST] == MOCK_HOST
+    assert result3["data"][CONF_GLT_PIN] == MOCK_GLT_PIN
+
+
+async def test_config_flow_subnet_scan_empty(hass: HomeAssistant):
+    """Test that a scan without results asks again."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch(
+        "custom_components.dachs_modbus.config_flow.async_scan", return_value={}
+    ):
+        result2 = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {
+                CONF_HOST: "1.2.3.0/24",
+                CONF_PORT: MOCK_PORT,
+                CONF_GLT_PIN: MOCK_GLT_PIN,
+                CONF_SCAN_INTERVAL: MOCK_SCAN_INTERVAL,
+            },
+        )
+    assert result2["errors"] == {CONF_HOST: "no_devices_found"}
+
+
+async def test_options_flow(hass: HomeAssistant):
+    """Test that the options default to the entry data and are stored."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id=MOCK_HOST,
+        data={
+            CONF_HOST: MOCK_HOST,
+            CONF_PORT: MOCK_PORT,
+            CONF_GLT_PIN: MOCK_GLT_PIN,
+            CONF_SCAN_INTERVAL: MOCK_SCAN_INTERVAL,
+        },
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "init"
+    schema = result["data_schema"]({})
+    assert schema[CONF_SCAN_INTERVAL] == MOCK_SCAN_INTERVAL
+    assert schema[CONF_TIMEOUT] == DEFAULT_TIMEOUT
+    # Only a fleet limit set explicitly counts, so it has no default.
+    assert CONF_FLEET_CONCURRENCY not in schema
+
+    result2 = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            CONF_SCAN_INTERVAL: 10,
+            CONF_COUNTER_INTERVAL: 600,
+            CONF_TIMEOUT: 1.5,
+            CONF_RETRIES: 1,
+        },
+    )
+    assert result2["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options == {
+        CONF_SCAN_INTERVAL: 10,
+        CONF_COUNTER_INTERVAL: 600,
+        CONF_TIMEOUT: 1.5,
+        CONF_RETRIES: 1,
+        CONF_READ_SPAN_MAX_GAP: READ_SPAN_MAX_GAP,
+        CONF_SAMPLE_INTERVAL: 0,
+    }
+
+
+async def test_options_flow_sample_interval(hass: HomeAssistant):
+    """Test that the sample interval may be under a second, but not too short."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id=MOCK_HOST,
+        data={
+            CONF_HOST: MOCK_HOST,
+            CONF_PORT: MOCK_PORT,
+            CONF_GLT_PIN: MOCK_GLT_PIN,
+            CONF_SCAN_INTERVAL: MOCK_SCAN_INTERVAL,
+        },
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result2 = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_SAMPLE_INTERVAL: 0.1}
+    )
+    assert result2["type"] == FlowResultType.FORM
+    assert result2["errors"] == {CONF_SAMPLE_INTERVAL: "sample_interval_too_short"}
+
+    result3 = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_SAMPLE_INTERVAL: 0.5}
+    )
+    assert result3["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_SAMPLE_INTERVAL] == 0.5
@@ -1,12 +1,45 @@
 """Unit tests for the Dachs Modbus coordinator."""
 
-import pytest
 from datetime import timedelta
-from unittest.mock import AsyncMock, patch
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.helpers.storage import Store
+from homeassistant.util.dt import utcnow
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
 from custom_components.dachs_modbus.coordinator import DachsModbusDataUpdateCoordinator
 from custom_components.dachs_modbus.api import DachsModbusApiClient
+from custom_components.dachs_modbus.breaker import DachsCircuitBreaker
+from custom_components.dachs_modbus.snapshot import DachsSnapshot
+from custom_components.dachs_modbus.telemetry import DachsModbusTelemetry
+from custom_components.dachs_modbus.const import (
+    BURST_POLL_INTERVAL,
+    CONF_CAPABILITIES,
+    CURRENT_DISCHARGE_POWER,
+    DEVICE_TYPE,
+    DOMAIN,
+    GLT_INTERFACE_VERSION,
+    ELECTRICAL_POWER,
+    IDLE_POLL_DELAY,
+    IDLE_POLL_INTERVAL,
+    OUTSIDE_TEMPERATURE,
+    SERIAL_NUMBER,
+    SETPOINT_WATCHDOG_WINDOW,
+    SNAPSHOT_SAVE_DELAY,
+    TIER_COUNTER,
+    TIER_FAST,
+    TIER_IDENTITY,
+    TOTAL_STARTS,
+    TYPE_OF_REQUEST,
+    UNIT_STATUS,
+)
 
 pytestmark = pytest.mark.asyncio
 
@@ -15,31 +48,393 @@ pytestmark = pytest.mark.asyncio
 async def test_successful_update(hass):
     "Test successful data update."
     mock_api_client = AsyncMock(spec=DachsModbusApiClient)
-    mock_api_client.get_data.return_value = {"test": "data"}
+    mock_api_client.get_control_data.return_value = {}
+    mock_api_client.get_tier_data.return_value = {UNIT_STATUS: 2}
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is True
+    assert isinstance(coordinator.data, DachsSnapshot)
+    assert coordinator.data[UNIT_STATUS] == "Running"
+    assert [c.args for c in mock_api_client.get_tier_data.await_args_list] == [
+        (TIER_IDENTITY,),
+        (TIER_COUNTER,),
+        (TIER_FAST,),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_tiered_update(hass):
+    "Test that identity and counter values are not re-read on every poll."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_control_data.return_value = {}
+    tier_values = {
+        TIER_IDENTITY: {SERIAL_NUMBER: "5512345678"},
+        TIER_COUNTER: {TOTAL_STARTS: 3400},
+        TIER_FAST: {ELECTRICAL_POWER: 5.5},
+    }
+    mock_api_client.get_tier_data.side_effect = lambda tier: tier_values[tier]
 
-    with patch(
-        "homeassistant.core.HomeAssistant.async_add_executor_job",
-        return_value={"test": "data"},
-    ):
-        coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
-        await coordinator.async_refresh()
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60, 300)
+    await coordinator.async_refresh()
+    mock_api_client.get_tier_data.reset_mock()
+    await coordinator.async_refresh()
 
-        assert coordinator.last_update_success is True
-        assert coordinator.data == {"test": "data"}
-        mock_api_client.get_data.assert_called_once()
+    mock_api_client.get_tier_data.assert_awaited_once_with(TIER_FAST)
+    assert coordinator.data.serial_number == "5512345678"
+    assert coordinator.data.total_starts == 3400
+    assert coordinator.data.electrical_power == 5.5
 
 
 @pytest.mark.asyncio
 async def test_update_failed_api_error(hass):
     "Test data update failure due to API error."
     mock_api_client = AsyncMock(spec=DachsModbusApiClient)
-    mock_api_client.get_data.side_effect = Exception("API Error")
+    mock_api_client.get_control_data.return_value = {}
+    mock_api_client.get_tier_data.side_effect = Exception("API Error")
+    mock_api_client.breaker = DachsCircuitBreaker(
+        "unit", failure_threshold=1, reset_timeout=600
+    )
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is False
+    assert coordinator.update_interval == timedelta(seconds=60)
+
+    # With the circuit open, the next poll waits for the probe.
+    mock_api_client.breaker.record_failure()
+    await coordinator.async_refresh()
+    assert coordinator.update_interval > timedelta(seconds=590)
+
+
+@pytest.mark.asyncio
+async def test_change_only_notification(hass):
+    "Test that listeners are only notified when their value changes enough."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_control_data.return_value = {}
+    values = {OUTSIDE_TEMPERATURE: 20.0, UNIT_STATUS: 1}
+    mock_api_client.get_tier_data.side_effect = lambda tier: (
+        dict(values) if tier == TIER_FAST else {}
+    )
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    coordinator.deadbands[OUTSIDE_TEMPERATURE] = (0.5, None)
+    temperature_listener = MagicMock()
+    status_listener = MagicMock()
+    coordinator.async_add_listener(temperature_listener, OUTSIDE_TEMPERATURE)
+    coordinator.async_add_listener(status_listener, UNIT_STATUS)
+
+    await coordinator.async_refresh()
+    assert temperature_listener.call_count == 1
+    assert status_listener.call_count == 1
+
+    values[OUTSIDE_TEMPERATURE] = 20.3
+    await coordinator.async_refresh()
+    assert temperature_listener.call_count == 1
+    assert status_listener.call_count == 1
+
+    values[OUTSIDE_TEMPERATURE] = 20.5
+    values[UNIT_STATUS] = 2
+    await coordinator.async_refresh()
+    assert temperature_listener.call_count == 2
+    assert status_listener.call_count == 2
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_poll_telemetry(hass):
+    "Test that poll durations and failures are recorded."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_control_data.return_value = {}
+    mock_api_client.telemetry = DachsModbusTelemetry()
+    mock_api_client.get_tier_data.return_value = {"test": "data"}
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    await coordinator.async_refresh()
+    mock_api_client.get_tier_data.side_effect = Exception("API Error")
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+
+    telemetry = mock_api_client.telemetry
+    assert telemetry.polls == 3
+    assert telemetry.consecutive_failures == 2
+    assert len(telemetry.poll_durations) == 1
+    assert telemetry.percentile(0.99) == telemetry.poll_durations[0]
+
+
+@pytest.mark.asyncio
+async def test_setpoint_heartbeat(hass):
+    "Test that the heartbeat only re-sends a setpoint that is about to expire."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_control_data.return_value = {}
+    mock_api_client.power_setpoint = 2500
+    mock_api_client.setpoint_written_at = time.monotonic()
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    await coordinator._async_heartbeat()
+    mock_api_client.set_electrical_power.assert_not_awaited()
+    assert coordinator.heartbeat_sent_at is None
+
+    mock_api_client.setpoint_written_at -= SETPOINT_WATCHDOG_WINDOW
+    await coordinator._async_heartbeat()
+    mock_api_client.set_electrical_power.assert_awaited_once_with(2500)
+    assert coordinator.heartbeat_sent_at is not None
+
+
+@pytest.mark.asyncio
+async def test_adaptive_poll_interval(hass):
+    "Test that the poll interval follows the unit status and control commands."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_control_data.return_value = {}
+    values = {UNIT_STATUS: 2, TYPE_OF_REQUEST: 0}
+    mock_api_client.get_tier_data.side_effect = lambda tier: (
+        dict(values) if tier == TIER_FAST else {}
+    )
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=60)
+
+    values[UNIT_STATUS] = 0
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=60)
+    coordinator._idle_since -= IDLE_POLL_DELAY
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=IDLE_POLL_INTERVAL)
+
+    values[TYPE_OF_REQUEST] = 3
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=60)
+
+    values[TYPE_OF_REQUEST] = 0
+    await coordinator.async_refresh_controls()
+    assert coordinator.update_interval == timedelta(seconds=BURST_POLL_INTERVAL)
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=BURST_POLL_INTERVAL)
+
+
+@pytest.mark.asyncio
+async def test_apply_options(hass):
+    "Test that changed options apply to the running coordinator."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.connection = MagicMock()
+    mock_api_client.get_control_data.return_value = {}
+    mock_api_client.get_tier_data.return_value = {UNIT_STATUS: 2}
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    await coordinator.async_refresh()
+    coordinator.async_apply_options(
+        scan_interval=10, counter_interval=600, timeout=1.5, retries=2, max_gap=0
+    )
+
+    assert coordinator.update_interval == timedelta(seconds=10)
+    assert coordinator.counter_interval == 600
+    mock_api_client.connection.configure.assert_called_once_with(1.5, 2)
+    mock_api_client.set_max_gap.assert_called_once_with(0)
+
+
+@pytest.mark.asyncio
+async def test_sample_interval(hass):
+    "Test that sampling starts, changes and stops with its option."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+
+    coordinator.async_set_sample_interval(5)
+    sampler = coordinator.sampler
+    assert sampler.interval == 5
+    coordinator.async_set_sample_interval(5)
+    assert coordinator.sampler is sampler
+    coordinator.async_set_sample_interval(2)
+    assert coordinator.sampler.interval == 2
+
+    coordinator.async_set_sample_interval(0)
+    assert coordinator.sampler is None
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=10))
+    await hass.async_block_till_done()
+    mock_api_client.get_sample_data.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_read_plan_follows_listeners(hass):
+    "Test that only the registers of subscribed entities are read."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_control_data.return_value = {}
+    mock_api_client.get_tier_data.return_value = {}
+    mock_api_client.set_read_keys = MagicMock()
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    await coordinator.async_refresh()
+    mock_api_client.set_read_keys.assert_not_called()
+
+    remove_listener = coordinator.async_add_listener(MagicMock(), ELECTRICAL_POWER)
+    mock_api_client.get_tier_data.reset_mock()
+    await coordinator.async_refresh()
+    mock_api_client.set_read_keys.assert_called_once_with(
+        frozenset({ELECTRICAL_POWER, UNIT_STATUS, TYPE_OF_REQUEST})
+    )
+    # The counter tier is re-read for the new plan.
+    mock_api_client.get_tier_data.assert_any_await(TIER_COUNTER)
+
+    remove_listener()
+    await coordinator.async_refresh()
+    mock_api_client.set_read_keys.assert_called_with(None)
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_capabilities_probed_once_per_firmware(hass):
+    "Test that supported registers are probed once and kept in the entry."
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_tier_data.return_value = {
+        DEVICE_TYPE: 2601,
+        GLT_INTERFACE_VERSION: 1,
+    }
+    mock_api_client.probe_input_ranges.return_value = [(0, 46)]
+    mock_api_client.set_supported_keys = MagicMock()
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    await coordinator.async_setup_capabilities(entry)
+    assert entry.data[CONF_CAPABILITIES] == {"2601_1": [(0, 46)]}
+    supported_keys = mock_api_client.set_supported_keys.call_args.args[0]
+    assert UNIT_STATUS in supported_keys
+    assert CURRENT_DISCHARGE_POWER not in supported_keys
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    await coordinator.async_setup_capabilities(entry)
+    mock_api_client.probe_input_ranges.assert_awaited_once()
+    assert mock_api_client.set_supported_keys.call_args.args[0] == supported_keys
+
+
+@pytest.mark.asyncio
+async def test_publish_interval(hass):
+    "Test that a counter is published at most once per publish interval."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_control_data.return_value = {}
+    values = {TOTAL_STARTS: 3400}
+    mock_api_client.get_tier_data.side_effect = lambda tier: (
+        dict(values) if tier == TIER_FAST else {}
+    )
+
+    coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
+    coordinator.publish_intervals[TOTAL_STARTS] = 900
+    listener = MagicMock()
+    coordinator.async_add_listener(listener, TOTAL_STARTS)
+
+    await coordinator.async_refresh()
+    values[TOTAL_STARTS] = 3401
+    await coordinator.async_refresh()
+    assert listener.call_count == 1
+
+    # The held back value is published once the interval has passed, even
+    # without a new reading.
+    coordinator._published_at[TOTAL_STARTS] -= 900
+    await coordinator.async_refresh()
+    assert listener.call_count == 2
+    await coordinator.async_refresh()
+    assert listener.call_count == 2
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_warm_start(hass, hass_storage):
+    "Test that the last good values are stored and restored."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_control_data.return_value = {}
+    tier_values = {
+        TIER_IDENTITY: {SERIAL_NUMBER: "5512345678"},
+        TIER_COUNTER: {TOTAL_STARTS: 3400},
+        TIER_FAST: {UNIT_STATUS: 2},
+    }
+    mock_api_client.get_tier_data.side_effect = lambda tier: tier_values[tier]
+
+    coordinator = DachsModbusDataUpdateCoordinator(
+        hass, mock_api_client, 60, store=Store(hass, 1, "dachs_test")
+    )
+    assert not await coordinator.async_restore()
+    await coordinator.async_refresh()
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=SNAPSHOT_SAVE_DELAY))
+    await hass.async_block_till_done()
+    assert hass_storage["dachs_test"]["data"]["fast"] == {UNIT_STATUS: 2}
+
+    mock_api_client.get_tier_data.reset_mock()
+    coordinator = DachsModbusDataUpdateCoordinator(
+        hass, mock_api_client, 60, store=Store(hass, 1, "dachs_test")
+    )
+    assert await coordinator.async_restore()
+    assert coordinator.data[SERIAL_NUMBER] == "5512345678"
+    assert coordinator.data[UNIT_STATUS] == "Running"
+    mock_api_client.get_tier_data.assert_not_awaited()
+
+    # The first live poll reads every tier again.
+    await coordinator.async_refresh()
+    assert coordinator.restored is False
+    assert mock_api_client.get_tier_data.await_count == 3
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_failed_poll_keeps_stored_values(hass, hass_storage):
+    "Test that a failed poll before the save does not spoil the stored values."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.breaker = DachsCircuitBreaker("unit")
+    mock_api_client.get_control_data.return_value = {}
+    mock_api_client.get_tier_data.side_effect = lambda tier: {
+        TIER_IDENTITY: {SERIAL_NUMBER: "5512345678"},
+        TIER_COUNTER: {TOTAL_STARTS: 3400},
+        TIER_FAST: {UNIT_STATUS: 2},
+    }[tier]
+
+    coordinator = DachsModbusDataUpdateCoordinator(
+        hass, mock_api_client, 60, store=Store(hass, 1, "dachs_test")
+    )
+    await coordinator.async_refresh()
+    # A new listener drops the counters to read them along, and that fails.
+    coordinator._counters = None
+    mock_api_client.get_tier_data.side_effect = Exception("API Error")
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success is False
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=SNAPSHOT_SAVE_DELAY))
+    await hass.async_block_till_done()
+    assert hass_storage["dachs_test"]["data"]["counters"] == {TOTAL_STARTS: 3400}
+
+    # Stored values with a missing tier are not restored.
+    hass_storage["dachs_test"]["data"]["counters"] = None
+    coordinator = DachsModbusDataUpdateCoordinator(
+        hass, mock_api_client, 60, store=Store(hass, 1, "dachs_test")
+    )
+    assert not await coordinator.async_restore()
+    assert coordinator.data is None
+
+
+@pytest.mark.asyncio
+async def test_values_stored_while_polling(hass, hass_storage):
+    "Test that frequent polls do not keep pushing the save back."
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_control_data.return_value = {}
+    fast = {ELECTRICAL_POWER: 0}
+    mock_api_client.get_tier_data.side_effect = lambda tier: {
+        TIER_IDENTITY: {SERIAL_NUMBER: "5512345678"},
+        TIER_COUNTER: {TOTAL_STARTS: 3400},
+        TIER_FAST: dict(fast),
+    }[tier]
 
-    with patch(
-        "homeassistant.core.HomeAssistant.async_add_executor_job",
-        side_effect=Exception("API Error"),
-    ):
-        coordinator = DachsModbusDataUpdateCoordinator(hass, mock_api_client, 60)
-        await coordinator.async_refresh()
+    coordinator = DachsModbusDataUpdateCoordinator(
+        hass, mock_api_client, 30, store=Store(hass, 1, "dachs_test")
+    )
+    start = time.monotonic()
+    with patch("custom_components.dachs_modbus.coordinator.time") as clock:
+        clock.perf_counter.return_value = 0.0
+        for poll in range(40):
+            clock.monotonic.return_value = start + poll * 30
+            fast[ELECTRICAL_POWER] = poll
+            await coordinator.async_refresh()
+            async_fire_time_changed(hass, utcnow() + timedelta(seconds=poll * 30))
+            await hass.async_block_till_done()
+    coordinator._async_unsub_refresh()
 
-        assert coordinator.last_update_success is False
+    stored = hass_storage["dachs_test"]["data"]["fast"][ELECTRICAL_POWER]
+    assert stored >= 40 - SNAPSHOT_SAVE_DELAY // 30
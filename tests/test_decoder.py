@@ -0,0 +1,94 @@
+"""Unit tests for the Dachs Modbus register decoder."""
+
+import pytest
+
+from custom_components.dachs_modbus.const import (
+    INPUT_REGISTER_COUNT,
+    INPUT_REGISTERS,
+    DATA_TYPE_INT16,
+    DachsRegister,
+    SERIAL_NUMBER,
+    DEVICE_TYPE,
+    ELECTRICAL_POWER,
+    OUTSIDE_TEMPERATURE,
+    TOTAL_STARTS,
+    GENERATED_ELECTRICAL_ENERGY,
+    CURRENT_DISCHARGE_POWER,
+    TIER_COUNTER,
+    TIER_FAST,
+    TIER_IDENTITY,
+    UNIT_STATUS,
+)
+from custom_components.dachs_modbus.decoder import (
+    INPUT_REGISTER_DECODER,
+    RegisterDecoder,
+    build_read_plan,
+    build_tier_plans,
+)
+
+
+def _registers() -> list[int]:
+    """Return a register block with a few known values."""
+    registers = [0] * INPUT_REGISTER_COUNT
+    registers[1] = 2601
+    registers[2:7] = [0x3132, 0x3334, 0x3536, 0x3738, 0x3930]
+    registers[14] = 55  # 5.5 kW
+    registers[29:31] = [0x0001, 0x0002]  # 65538 starts
+    registers[31:33] = [0x0000, 12345]  # 1234.5 kWh
+    registers[41] = 0xFFEC  # -2.0 °C
+    registers[56] = 1500
+    return registers
+
+
+def test_decode_input_registers():
+    """Test decoding of the full input register block."""
+    data = INPUT_REGISTER_DECODER.decode_registers(_registers())
+
+    assert set(data) == {register.key for register in INPUT_REGISTERS}
+    assert data[DEVICE_TYPE] == 2601
+    assert data[SERIAL_NUMBER] == "1234567890"
+    assert data[ELECTRICAL_POWER] == 5.5
+    assert data[TOTAL_STARTS] == 65538
+    assert data[GENERATED_ELECTRICAL_ENERGY] == 1234.5
+    assert data[OUTSIDE_TEMPERATURE] == -2.0
+    assert data[CURRENT_DISCHARGE_POWER] == 1500
+
+
+def test_overlapping_registers_rejected():
+    """Test that overlapping definitions are caught when compiling."""
+    registers = (
+        DachsRegister("a", 0, DATA_TYPE_INT16),
+        DachsRegister("b", 0, DATA_TYPE_INT16),
+    )
+    with pytest.raises(ValueError):
+        RegisterDecoder(registers, 0, 2)
+
+
+def test_build_read_plan_merges_small_gaps():
+    """Test that spans are merged only across gaps up to the threshold."""
+    registers = (
+        DachsRegister("a", 0, DATA_TYPE_INT16),
+        DachsRegister("b", 3, DATA_TYPE_INT16),
+        DachsRegister("c", 20, DATA_TYPE_INT16),
+    )
+    plan = build_read_plan(registers, max_gap=4)
+
+    assert [(d.start, d.count, d.keys) for d in plan] == [
+        (0, 4, ("a", "b")),
+        (20, 1, ("c",)),
+    ]
+
+
+def test_tier_plans_for_keys():
+    """Test that tier plans only span the registers of the given keys."""
+    plans = build_tier_plans(frozenset({UNIT_STATUS, ELECTRICAL_POWER}))
+
+    assert [(d.start, d.count) for d in plans[TIER_FAST]] == [(13, 2)]
+    assert plans[TIER_COUNTER] == ()
+    assert plans[TIER_IDENTITY][0].keys == (build_tier_plans()[TIER_IDENTITY][0].keys)
+
+    plans = build_tier_plans(
+        frozenset({UNIT_STATUS, CURRENT_DISCHARGE_POWER, TOTAL_STARTS}), max_gap=0
+    )
+    assert [(d.start, d.count) for d in plans[TIER_FAST]] == [(13, 1), (56, 1)]
+    assert [d.keys for d in plans[TIER_COUNTER]] == [(TOTAL_STARTS,)]
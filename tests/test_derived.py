@@ -0,0 +1,88 @@
+"""Unit tests for the Dachs Modbus derived metrics."""
+
+import pytest
+
+from custom_components.dachs_modbus.const import (
+    AVERAGE_RUN_LENGTH,
+    BUFFER_STRATIFICATION,
+    BUFFER_TEMPERATURE_T1,
+    BUFFER_TEMPERATURE_T4,
+    DERIVED_WINDOW,
+    GENERATED_ELECTRICAL_ENERGY,
+    GENERATED_THERMAL_ENERGY,
+    POWER_TO_HEAT_RATIO,
+    STARTS_PER_DAY,
+    THERMAL_POWER,
+    TOTAL_OPERATING_HOURS,
+    TOTAL_STARTS,
+)
+from custom_components.dachs_modbus.derived import DachsDerivedMetrics
+
+
+def _counters(electrical, thermal, starts, hours):
+    """Return a counter tier reading."""
+    return {
+        GENERATED_ELECTRICAL_ENERGY: electrical,
+        GENERATED_THERMAL_ENERGY: thermal,
+        TOTAL_STARTS: starts,
+        TOTAL_OPERATING_HOURS: hours,
+    }
+
+
+def test_counter_metrics():
+    """Test metrics derived from consecutive counter readings."""
+    metrics = DachsDerivedMetrics()
+
+    metrics.update_counters(_counters(100.0, 200.0, 10, 50), 0)
+    assert metrics.values[THERMAL_POWER] is None
+    assert metrics.values[STARTS_PER_DAY] is None
+
+    metrics.update_counters(_counters(105.5, 212.5, 12, 51), 3600)
+    assert metrics.values[THERMAL_POWER] == 12.5
+    assert metrics.values[POWER_TO_HEAT_RATIO] == pytest.approx(0.44)
+    assert metrics.values[STARTS_PER_DAY] == 48
+    assert metrics.values[AVERAGE_RUN_LENGTH] == 0.5
+
+    # Readings older than the window no longer count.
+    metrics.update_counters(_counters(105.5, 212.5, 12, 51), DERIVED_WINDOW + 1800)
+    assert metrics.values[THERMAL_POWER] == 0
+    assert metrics.values[STARTS_PER_DAY] == 0
+    assert metrics.values[AVERAGE_RUN_LENGTH] is None
+
+
+def test_thermal_power_over_short_intervals():
+    """Test that counter reads seconds apart do not make thermal power jump."""
+    metrics = DachsDerivedMetrics()
+
+    metrics.update_counters(_counters(100.0, 200.0, 10, 50), 0)
+    metrics.update_counters(_counters(100.0, 200.0, 10, 50), 870)
+    assert metrics.values[THERMAL_POWER] is None
+
+    # A step 30 s after the previous read is averaged over the reading at
+    # 0, and the next read 5 s later does not drop back to 0.
+    metrics.update_counters(_counters(100.0, 203.0, 10, 50), 900)
+    assert metrics.values[THERMAL_POWER] == pytest.approx(12.0)
+    metrics.update_counters(_counters(100.0, 203.0, 10, 50), 905)
+    assert metrics.values[THERMAL_POWER] == pytest.approx(11.93, abs=0.01)
+
+
+def test_window_metrics_over_short_spans():
+    """Test that windowed metrics wait for an hour of readings."""
+    metrics = DachsDerivedMetrics()
+
+    metrics.update_counters(_counters(100.0, 200.0, 10, 50), 0)
+    metrics.update_counters(_counters(100.5, 200.1, 11, 50), 300)
+    assert metrics.values[POWER_TO_HEAT_RATIO] is None
+    assert metrics.values[STARTS_PER_DAY] is None
+    assert metrics.values[AVERAGE_RUN_LENGTH] is None
+
+
+def test_buffer_stratification():
+    """Test the spread between the top and bottom buffer temperature."""
+    metrics = DachsDerivedMetrics()
+
+    metrics.update_fast({BUFFER_TEMPERATURE_T1: 70.2, BUFFER_TEMPERATURE_T4: 40.1})
+    assert metrics.values[BUFFER_STRATIFICATION] == 30.1
+
+    metrics.update_fast({BUFFER_TEMPERATURE_T1: 70.2})
+    assert metrics.values[BUFFER_STRATIFICATION] is None
@@ -0,0 +1,38 @@
+"""Tests of the Dachs Modbus diagnostics download."""
+
+from unittest.mock import MagicMock
+
+from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
+
+from custom_components.dachs_modbus.api import DachsModbusApiClient
+from custom_components.dachs_modbus.const import DOMAIN, CONF_GLT_PIN, SERIAL_NUMBER
+from custom_components.dachs_modbus.coordinator import DachsModbusDataUpdateCoordinator
+from custom_components.dachs_modbus.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+MOCK_ENTRY_ID = "diagnostics_entry_1"
+
+
+async def test_diagnostics(hass: HomeAssistant):
+    """Test that diagnostics include telemetry and redact secrets."""
+    api = DachsModbusApiClient("1.2.3.4", 502, "1234")
+    coordinator = DachsModbusDataUpdateCoordinator(hass, api, 60)
+    coordinator.data = {SERIAL_NUMBER: "5512345678", "unit_status": 2}
+    api.telemetry.record_request(0.001, 0.02, 0.0001)
+    api.telemetry.record_poll(0.025, True)
+    entry = MagicMock(
+        entry_id=MOCK_ENTRY_ID,
+        data={CONF_HOST: "1.2.3.4", CONF_PORT: 502, CONF_GLT_PIN: "1234"},
+    )
+    hass.data.setdefault(DOMAIN, {})[MOCK_ENTRY_ID] = coordinator
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"][CONF_GLT_PIN] == "**REDACTED**"
+    assert diagnostics["data"][SERIAL_NUMBER] == "**REDACTED**"
+    assert diagnostics["connection"]["state"] == "disconnected"
+    assert diagnostics["circuit"]["state"] == "closed"
+    assert diagnostics["telemetry"]["round_trip"] == 0.02
+    assert diagnostics["telemetry"]["poll_duration_p95"] == 0.025
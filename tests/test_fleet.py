@@ -0,0 +1,101 @@
+"""Unit tests for the Dachs Modbus fleet scheduler."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from custom_components.dachs_modbus.api import DachsModbusApiClient
+from custom_components.dachs_modbus.coordinator import DachsModbusDataUpdateCoordinator
+from custom_components.dachs_modbus.fleet import DachsFleetScheduler
+from custom_components.dachs_modbus.telemetry import DachsModbusTelemetry
+from custom_components.dachs_modbus.const import DEFAULT_FLEET_CONCURRENCY, UNIT_STATUS
+
+
+def test_phases_stay_spread():
+    """Test that members keep their phase and fill the widest gap."""
+    fleet = DachsFleetScheduler()
+    members = [object() for _ in range(4)]
+    assert [fleet.async_join(member) for member in members] == [0, 0.5, 0.25, 0.75]
+
+    fleet.async_leave(members[1])
+    assert fleet.async_join(object()) == 0.5
+    assert fleet.phase(members[3]) == 0.75
+
+
+def test_next_run():
+    """Test that polls land on the phase of the member."""
+    fleet = DachsFleetScheduler()
+    first, second = object(), object()
+    fleet.async_join(first)
+    fleet.async_join(second)
+
+    assert fleet.next_run(first, 1000.0, 60) == 1080.0
+    assert fleet.next_run(second, 1000.0, 60) == 1050.0
+    # A poll that ran just before its phase does not get an early successor.
+    assert fleet.next_run(second, 1049.0, 60) == 1110.0
+
+
+def test_lowest_limit_applies():
+    """Test that the limit does not depend on the order members join."""
+    fleet = DachsFleetScheduler()
+    first, second = object(), object()
+    fleet.async_join(first, 2)
+    fleet.async_join(second, 6)
+    assert fleet.limit == 2
+    # A member without a limit of its own does not count.
+    fleet.async_join(object())
+    assert fleet.limit == 2
+
+    fleet.set_limit(first, 8)
+    assert fleet.limit == 6
+    fleet.async_leave(second)
+    assert fleet.limit == 8
+    fleet.async_leave(first)
+    assert fleet.limit == DEFAULT_FLEET_CONCURRENCY
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit(hass):
+    """Test that polls beyond the limit wait and report their drift."""
+    fleet = DachsFleetScheduler(limit=1)
+    release = asyncio.Event()
+    running = []
+
+    async def get_tier_data(tier):
+        running.append(tier)
+        await release.wait()
+        return {UNIT_STATUS: 2}
+
+    coordinators = []
+    for _ in range(2):
+        mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+        mock_api_client.telemetry = DachsModbusTelemetry()
+        mock_api_client.get_control_data.return_value = {}
+        mock_api_client.get_tier_data.side_effect = get_tier_data
+        coordinator = DachsModbusDataUpdateCoordinator(
+            hass, mock_api_client, 60, fleet=fleet
+        )
+        fleet.async_join(coordinator)
+        coordinators.append(coordinator)
+
+    coordinators[1]._due_at = hass.loop.time()
+    polls = [
+        hass.async_create_task(coordinator.async_refresh())
+        for coordinator in coordinators
+    ]
+    await asyncio.sleep(0.05)
+    assert len(running) == 1
+
+    release.set()
+    await asyncio.gather(*polls)
+    assert all(coordinator.last_update_success for coordinator in coordinators)
+    assert coordinators[1].api.telemetry.schedule_drift >= 0.05
+    assert coordinators[0].api.telemetry.schedule_drift is None
+
+    # The next poll is scheduled at the phase of the unit.
+    coordinators[1]._schedule_refresh()
+    assert coordinators[1]._planned_at == fleet.next_run(
+        coordinators[1], hass.loop.time(), 60
+    )
+    coordinators[1]._async_unsub_refresh()
@@ -5,9 +5,16 @@ from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import HomeAssistant
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
 
-from custom_components.dachs_modbus.const import DOMAIN, CONF_GLT_PIN
+from custom_components.dachs_modbus.const import (
+    DOMAIN,
+    CONF_GLT_PIN,
+    DATA_CONNECTIONS,
+    DEFAULT_UNIT_ID,
+    READ_SPAN_MAX_GAP,
+)
 from custom_components.dachs_modbus.coordinator import DachsModbusDataUpdateCoordinator
 from custom_components.dachs_modbus import async_setup_entry, async_unload_entry
+from custom_components.dachs_modbus.connection import async_get_connection
 
 MOCK_HOST = "1.2.3.4"
 MOCK_PORT = 502
@@ -26,12 +33,17 @@ def mock_config_entry():
             CONF_GLT_PIN: MOCK_GLT_PIN,
             CONF_SCAN_INTERVAL: MOCK_SCAN_INTERVAL,
         },
+        options={},
         entry_id=MOCK_ENTRY_ID,
         title="Senertec Dachs",
     )
 
 
 @patch("custom_components.dachs_modbus.DachsModbusApiClient")
+@patch(
+    "custom_components.dachs_modbus.DachsModbusDataUpdateCoordinator.async_setup_capabilities",
+    return_value=None,
+)
 @patch(
     "custom_components.dachs_modbus.DachsModbusDataUpdateCoordinator.async_config_entry_first_refresh",
     return_value=None,
@@ -42,6 +54,7 @@ def mock_config_entry():
 async def test_async_setup_entry(
     mock_forward_setup,
     mock_first_refresh,
+    mock_setup_capabilities,
     MockDachsModbusApiClient,
     hass: HomeAssistant,
     mock_config_entry,
@@ -58,6 +71,9 @@ async def test_async_setup_entry(
         host=MOCK_HOST,
         port=MOCK_PORT,
         glt_pin=MOCK_GLT_PIN,
+        unit_id=DEFAULT_UNIT_ID,
+        connection=hass.data[DATA_CONNECTIONS][(MOCK_HOST, MOCK_PORT)],
+        max_gap=READ_SPAN_MAX_GAP,
     )
 
     # Check that coordinator is created and stored
@@ -66,11 +82,18 @@ async def test_async_setup_entry(
     assert isinstance(coordinator, DachsModbusDataUpdateCoordinator)
     assert coordinator.api == mock_api_client_instance
 
+    mock_setup_capabilities.assert_called_once_with(mock_config_entry)
     mock_first_refresh.assert_called_once()
     mock_forward_setup.assert_called_once_with(
         mock_config_entry, ["sensor", "number", "switch"]
     )
 
+    # Stop the setpoint heartbeat registered for unload; the options
+    # listener and the sampler stop are registered after it.
+    assert mock_config_entry.async_on_unload.call_count == 3
+    mock_config_entry.async_on_unload.call_args_list[0].args[0]()
+    mock_config_entry.add_update_listener.assert_called_once()
+
 
 @patch("homeassistant.config_entries.ConfigEntries.async_unload_platforms")
 async def test_async_unload_entry(
@@ -80,8 +103,11 @@ async def test_async_unload_entry(
 ):
     """Test successful unload of the integration."""
     # Pre-populate hass.data as if setup was successful
+    connection = async_get_connection(hass, MOCK_HOST, MOCK_PORT)
+    coordinator = MagicMock()  # Mock coordinator
+    coordinator.api.connection = connection
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][mock_config_entry.entry_id] = MagicMock()  # Mock coordinator
+    hass.data[DOMAIN][mock_config_entry.entry_id] = coordinator
     mock_unload_platforms.return_value = True
 
     success = await async_unload_entry(hass, mock_config_entry)
@@ -92,3 +118,4 @@ async def test_async_unload_entry(
         mock_config_entry, ["sensor", "number", "switch"]
     )
     assert mock_config_entry.entry_id not in hass.data[DOMAIN]
+    assert not hass.data[DATA_CONNECTIONS]
@@ -0,0 +1,151 @@
+"""Tests of the Dachs Modbus number entities."""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymodbus.exceptions import ModbusIOException
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from custom_components.dachs_modbus.breaker import DachsCircuitBreaker
+from custom_components.dachs_modbus.const import NOMINAL_POWER, SET_ELECTRICAL_POWER
+from custom_components.dachs_modbus.coordinator import DachsModbusDataUpdateCoordinator
+from custom_components.dachs_modbus.number import (
+    NUMBER_TYPES,
+    SETPOINT_DEBOUNCE_COOLDOWN,
+    DachsModbusNumber,
+)
+
+MOCK_ENTRY_ID = "number_entry_1"
+
+
+async def test_setpoint_burst_is_debounced(hass: HomeAssistant):
+    """Test that only the last value of a slider burst is written."""
+    coordinator = MagicMock(spec=DachsModbusDataUpdateCoordinator)
+    coordinator.hass = hass
+    coordinator.api = MagicMock()
+    coordinator.api.set_electrical_power = AsyncMock()
+    entry = MagicMock(spec=ConfigEntry)
+    entry.entry_id = MOCK_ENTRY_ID
+    coordinator.last_update_success = True
+    coordinator.data = {SET_ELECTRICAL_POWER: 0, NOMINAL_POWER: 5500}
+    number = DachsModbusNumber(coordinator, NUMBER_TYPES[0], entry)
+    number.hass = hass
+    number.entity_id = "number.dachs_set_electrical_power"
+
+    for value in (1000, 1500, 2500):
+        await number.async_set_native_value(value)
+    coordinator.api.set_electrical_power.assert_not_awaited()
+    # The requested value is shown before it has been written.
+    assert hass.states.get(number.entity_id).state == "2500"
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=SETPOINT_DEBOUNCE_COOLDOWN + 1)
+    )
+    await hass.async_block_till_done()
+
+    coordinator.api.set_electrical_power.assert_awaited_once_with(2500)
+    coordinator.async_refresh_controls.assert_awaited_once()
+    await number.async_will_remove_from_hass()
+
+
+async def test_setpoint_during_write_is_written(hass: HomeAssistant):
+    """Test that a value requested during a slow write is written after it."""
+    coordinator = MagicMock(spec=DachsModbusDataUpdateCoordinator)
+    coordinator.hass = hass
+    coordinator.api = MagicMock()
+    release = asyncio.Event()
+    written = []
+
+    async def set_electrical_power(value):
+        written.append(value)
+        await release.wait()
+
+    coordinator.api.set_electrical_power = set_electrical_power
+    entry = MagicMock(spec=ConfigEntry)
+    entry.entry_id = MOCK_ENTRY_ID
+    coordinator.last_update_success = True
+    coordinator.data = {SET_ELECTRICAL_POWER: 0, NOMINAL_POWER: 5500}
+    number = DachsModbusNumber(coordinator, NUMBER_TYPES[0], entry)
+    number.hass = hass
+    number.entity_id = "number.dachs_set_electrical_power"
+
+    await number.async_set_native_value(1000)
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=SETPOINT_DEBOUNCE_COOLDOWN + 1)
+    )
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert written == [1000]
+
+    await number.async_set_native_value(2000)
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=2 * SETPOINT_DEBOUNCE_COOLDOWN + 2)
+    )
+    release.set()
+    await hass.async_block_till_done()
+
+    assert written == [1000, 2000]
+    assert number.native_value == 0
+    await number.async_will_remove_from_hass()
+
+
+async def test_setpoint_fails_fast_with_open_circuit(hass: HomeAssistant):
+    """Test that a setpoint is refused at once while the circuit is open."""
+    coordinator = MagicMock(spec=DachsModbusDataUpdateCoordinator)
+    coordinator.hass = hass
+    coordinator.api = MagicMock()
+    coordinator.api.breaker = DachsCircuitBreaker("unit", failure_threshold=1)
+    coordinator.api.breaker.record_failure()
+    coordinator.api.set_electrical_power = AsyncMock()
+    entry = MagicMock(spec=ConfigEntry)
+    entry.entry_id = MOCK_ENTRY_ID
+    coordinator.last_update_success = True
+    coordinator.data = {SET_ELECTRICAL_POWER: 0, NOMINAL_POWER: 5500}
+    number = DachsModbusNumber(coordinator, NUMBER_TYPES[0], entry)
+    number.hass = hass
+    number.entity_id = "number.dachs_set_electrical_power"
+
+    with pytest.raises(HomeAssistantError, match="not answering"):
+        await number.async_set_native_value(1000)
+    assert number.native_value == 0
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=SETPOINT_DEBOUNCE_COOLDOWN + 1)
+    )
+    await hass.async_block_till_done()
+    coordinator.api.set_electrical_power.assert_not_awaited()
+    await number.async_will_remove_from_hass()
+
+
+async def test_setpoint_read_back_fails(hass: HomeAssistant, caplog):
+    """Test that a failed read-back is not reported as a failed write."""
+    coordinator = MagicMock(spec=DachsModbusDataUpdateCoordinator)
+    coordinator.hass = hass
+    coordinator.api = MagicMock()
+    coordinator.api.set_electrical_power = AsyncMock()
+    coordinator.async_refresh_controls.side_effect = ModbusIOException("timeout")
+    entry = MagicMock(spec=ConfigEntry)
+    entry.entry_id = MOCK_ENTRY_ID
+    coordinator.last_update_success = True
+    coordinator.data = {SET_ELECTRICAL_POWER: 0, NOMINAL_POWER: 5500}
+    number = DachsModbusNumber(coordinator, NUMBER_TYPES[0], entry)
+    number.hass = hass
+    number.entity_id = "number.dachs_set_electrical_power"
+
+    await number.async_set_native_value(2500)
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=SETPOINT_DEBOUNCE_COOLDOWN + 1)
+    )
+    await hass.async_block_till_done()
+
+    coordinator.api.set_electrical_power.assert_awaited_once_with(2500)
+    assert "failed to read it back" in caplog.text
+    assert "Failed to set the power setpoint" not in caplog.text
+    await number.async_will_remove_from_hass()
@@ -0,0 +1,53 @@
+"""Unit tests for the Dachs Modbus high-rate sampler."""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from pymodbus.exceptions import ModbusIOException
+
+from custom_components.dachs_modbus.api import DachsModbusApiClient
+from custom_components.dachs_modbus.const import (
+    CHP_OUTLET_TEMPERATURE,
+    ELECTRICAL_POWER,
+)
+from custom_components.dachs_modbus.sampler import (
+    DachsModbusSampler,
+    SampleRing,
+    SampleStats,
+)
+
+
+def test_ring_drain():
+    """Test aggregation of the samples since the previous drain."""
+    ring = SampleRing(4)
+    assert ring.drain() is None
+
+    for value in (1.0, 2.0, 6.0):
+        ring.append(value)
+    assert ring.drain() == SampleStats(3.0, 1.0, 6.0, 3)
+
+    # Wrap around; only the newest four samples are kept.
+    for value in (10.0, 20.0, 30.0, 40.0, 50.0):
+        ring.append(value)
+    assert ring.drain() == SampleStats(35.0, 20.0, 50.0, 4)
+    assert ring.drain() is None
+
+
+@pytest.mark.asyncio
+async def test_sampler(hass):
+    """Test that samples are collected and failed reads are skipped."""
+    mock_api_client = AsyncMock(spec=DachsModbusApiClient)
+    mock_api_client.get_sample_data.side_effect = [
+        {ELECTRICAL_POWER: 5.0, CHP_OUTLET_TEMPERATURE: 80.0},
+        ModbusIOException("timeout"),
+        {ELECTRICAL_POWER: 5.5, CHP_OUTLET_TEMPERATURE: 81.0},
+    ]
+    sampler = DachsModbusSampler(hass, mock_api_client, 1)
+
+    for _ in range(3):
+        await sampler._async_sample()
+
+    stats = sampler.async_drain()
+    assert stats[ELECTRICAL_POWER] == SampleStats(5.25, 5.0, 5.5, 2)
+    assert stats[CHP_OUTLET_TEMPERATURE].max == 81.0
+    assert sampler.async_drain() == {}
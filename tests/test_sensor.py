@@ -14,9 +14,11 @@ from custom_components.dachs_modbus.const import (
     SENSOR_PREFIX,
     ELECTRICAL_POWER,
     NOMINAL_POWER,
+    UNIT_STATUS,
 )
 from custom_components.dachs_modbus.sensor import DachsModbusSensor, SENSOR_TYPES
 from custom_components.dachs_modbus.coordinator import DachsModbusDataUpdateCoordinator
+from custom_components.dachs_modbus.snapshot import DachsSnapshot
 
 MOCK_ENTRY_ID = "sensor_entry_1"
 
@@ -26,7 +28,9 @@ def mock_coordinator(hass):
     """Mock DachsModbusDataUpdateCoordinator."""
     coordinator = MagicMock(spec=DachsModbusDataUpdateCoordinator)
     coordinator.hass = hass
-    coordinator.data = {ELECTRICAL_POWER: 123, NOMINAL_POWER: 5500}
+    coordinator.data = DachsSnapshot(
+        {ELECTRICAL_POWER: 123, NOMINAL_POWER: 5500, UNIT_STATUS: 2}
+    )
     coordinator.config_entry = MagicMock(spec=ConfigEntry)
     coordinator.config_entry.entry_id = MOCK_ENTRY_ID
     return coordinator
@@ -59,3 +63,13 @@ async def test_sensor_creation_and_device_info(
         assert device_info["name"] == SENSOR_PREFIX
         assert device_info["manufacturer"] == "Senertec"
         assert device_info["model"] == "Dachs"
+
+
+async def test_sensor_enum_value(
+    hass: HomeAssistant, mock_coordinator, mock_config_entry_obj
+):
+    """Test that enum sensors show the translated value of the snapshot."""
+    description = next(d for d in SENSOR_TYPES if d.key == UNIT_STATUS)
+    sensor = DachsModbusSensor(mock_coordinator, description, mock_config_entry_obj)
+
+    assert sensor.native_value == "Running"
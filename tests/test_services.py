@@ -0,0 +1,62 @@
+"""Tests of the Dachs Modbus services."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from pymodbus.exceptions import ModbusIOException
+
+from custom_components.dachs_modbus.const import (
+    ATTR_ADDRESS,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_COUNT,
+    ATTR_REGISTER_TYPE,
+    DOMAIN,
+    REGISTER_TYPE_INPUT,
+    SERVICE_READ_REGISTERS,
+)
+from custom_components.dachs_modbus.services import async_setup_services
+
+MOCK_ENTRY_ID = "services_entry_1"
+MOCK_CALL = {
+    ATTR_CONFIG_ENTRY_ID: MOCK_ENTRY_ID,
+    ATTR_REGISTER_TYPE: REGISTER_TYPE_INPUT,
+    ATTR_ADDRESS: 8046,
+    ATTR_COUNT: 2,
+}
+
+
+async def test_read_registers(hass: HomeAssistant):
+    """Test that the service returns the registers of the unit."""
+    coordinator = MagicMock()
+    coordinator.api.read_registers = AsyncMock(return_value=[1, 2])
+    hass.data.setdefault(DOMAIN, {})[MOCK_ENTRY_ID] = coordinator
+    async_setup_services(hass)
+
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_READ_REGISTERS, MOCK_CALL, blocking=True, return_response=True
+    )
+    assert response == {ATTR_ADDRESS: 8046, "registers": [1, 2]}
+    coordinator.api.read_registers.assert_awaited_once_with(
+        REGISTER_TYPE_INPUT, 8046, 2
+    )
+
+    coordinator.api.read_registers.side_effect = ModbusIOException("No response")
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_READ_REGISTERS,
+            MOCK_CALL,
+            blocking=True,
+            return_response=True,
+        )
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_READ_REGISTERS,
+            {**MOCK_CALL, ATTR_CONFIG_ENTRY_ID: "unknown"},
+            blocking=True,
+            return_response=True,
+        )
@@ -0,0 +1,203 @@
+"""Tests of the API client against the local Dachs simulator."""
+
+import asyncio
+from ipaddress import IPv4Network
+
+import pytest
+
+from pymodbus.exceptions import ModbusException
+
+from custom_components.dachs_modbus.api import DachsModbusApiClient
+from custom_components.dachs_modbus.connection import (
+    async_get_connection,
+    async_release_connection,
+)
+from custom_components.dachs_modbus.decoder import keys_in_ranges
+from custom_components.dachs_modbus.discovery import async_identify, async_scan
+from custom_components.dachs_modbus.const import (
+    BLOCK_CHP_VIA_GLT,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN,
+    CURRENT_DISCHARGE_POWER,
+    SET_ELECTRICAL_POWER,
+    DEVICE_TYPE,
+    ELECTRICAL_POWER,
+    HOLDING_REGISTER_START,
+    INPUT_REGISTER_START,
+    INPUT_REGISTERS,
+    REGISTER_TYPE_HOLDING,
+    REGISTER_TYPE_INPUT,
+    SERIAL_NUMBER,
+    TIER_FAST,
+    TIER_IDENTITY,
+    TOTAL_STARTS,
+    UNIT_STATUS,
+)
+from tests.simulator import (
+    ERROR_EXCEPTION,
+    ERROR_TIMEOUT,
+    RUNNING,
+    STOPPED,
+    DachsSimulator,
+    Scenario,
+)
+
+MOCK_GLT_PIN = "1234"
+
+
+@pytest.fixture
+async def simulator(socket_enabled):
+    """Run a simulated running unit on a local port."""
+    async with DachsSimulator(RUNNING) as simulator:
+        yield simulator
+
+
+@pytest.fixture
+async def api(simulator):
+    """Return an API client connected to the simulator."""
+    api = DachsModbusApiClient("127.0.0.1", simulator.port, MOCK_GLT_PIN)
+    yield api
+    api.close()
+
+
+async def test_get_data(api):
+    """Test decoding the full register block served by the simulator."""
+    data = await api.get_data()
+
+    assert set(data) == {register.key for register in INPUT_REGISTERS}
+    assert data[DEVICE_TYPE] == 2601
+    assert data[SERIAL_NUMBER] == "5512345678"
+    assert data[UNIT_STATUS] == 2
+    assert data[ELECTRICAL_POWER] == 5.5
+    assert data[TOTAL_STARTS] == 3400
+
+
+async def test_get_tier_data(api):
+    """Test that a tier read only returns the values of that tier."""
+    data = await api.get_tier_data(TIER_IDENTITY)
+
+    assert data[SERIAL_NUMBER] == "5512345678"
+    assert UNIT_STATUS not in data
+
+
+async def test_control_writes(api, simulator):
+    """Test that control writes land in the holding registers."""
+    await api.set_electrical_power(3000)
+    assert simulator.holding_registers == [1234, 3000, 0]
+
+    await api.set_block_chp(True)
+    assert simulator.holding_registers == [1234, 3000, 1]
+    assert await api.get_control_data() == {
+        SET_ELECTRICAL_POWER: 3000,
+        BLOCK_CHP_VIA_GLT: 1,
+    }
+    data = await api.get_data()
+    assert data[UNIT_STATUS] == 0
+    assert data[ELECTRICAL_POWER] == 0
+
+
+async def test_stopped_unit(socket_enabled):
+    """Test the stopped scenario."""
+    async with DachsSimulator(STOPPED) as simulator:
+        api = DachsModbusApiClient("127.0.0.1", simulator.port, MOCK_GLT_PIN)
+        data = await api.get_data()
+        api.close()
+
+    assert data[UNIT_STATUS] == 0
+    assert data[ELECTRICAL_POWER] == 0
+
+
+async def test_injected_errors(api, simulator):
+    """Test that exception responses surface without dropping the session."""
+    simulator.inject_errors(1, ERROR_EXCEPTION)
+    with pytest.raises(ModbusException):
+        await api.get_data()
+
+    assert (await api.get_data())[DEVICE_TYPE] == 2601
+    assert api.connection.reconnects == 0
+
+
+async def test_timeout_retries(api, simulator):
+    """Test that a missed response is retried on a new session."""
+    api.connection.configure(timeout=0.2, retries=1)
+    simulator.inject_errors(1, ERROR_TIMEOUT)
+    assert (await api.get_data())[DEVICE_TYPE] == 2601
+    assert api.connection.reconnects == 1
+
+    api.connection.configure(timeout=0.2, retries=0)
+    simulator.inject_errors(1, ERROR_TIMEOUT)
+    with pytest.raises(ModbusException):
+        await api.get_data()
+
+
+async def test_silent_unit_keeps_shared_session(hass, simulator):
+    """Test that a unit that stops answering does not drop its gateway."""
+    connection = async_get_connection(hass, "127.0.0.1", simulator.port, 1)
+    async_get_connection(hass, "127.0.0.1", simulator.port, 2)
+    connection.configure(timeout=0.2, retries=0)
+    healthy = DachsModbusApiClient(
+        "127.0.0.1", simulator.port, MOCK_GLT_PIN, 1, connection
+    )
+    silent = DachsModbusApiClient(
+        "127.0.0.1", simulator.port, MOCK_GLT_PIN, 2, connection
+    )
+    await silent.get_data()
+
+    simulator.silent_units.add(2)
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(ModbusException):
+            await silent.get_data()
+        assert (await healthy.get_data())[DEVICE_TYPE] == 2601
+    assert silent.breaker.state == CIRCUIT_OPEN
+    assert connection.reconnects == 0
+
+    # Once no unit answers, the session is dropped.
+    simulator.silent_units.add(1)
+    with pytest.raises(ModbusException):
+        await healthy.get_data()
+    assert not connection.connected
+
+    async_release_connection(hass, connection, 1)
+    async_release_connection(hass, connection, 2)
+
+
+async def test_read_registers(api, simulator):
+    """Test raw reads and that they share the registers of polls."""
+    registers = await api.read_registers(REGISTER_TYPE_INPUT, 8046, 10)
+    assert registers == simulator.input_registers()[46:56]
+    assert await api.read_registers(
+        REGISTER_TYPE_HOLDING, HOLDING_REGISTER_START, 1
+    ) == [simulator.holding_registers[0]]
+
+    # A read during a poll waits for it and is answered from its registers.
+    requests = simulator.requests
+    data, registers = await asyncio.gather(
+        api.get_data(), api.read_registers(REGISTER_TYPE_INPUT, INPUT_REGISTER_START, 2)
+    )
+    assert simulator.requests == requests + 1
+    assert registers == simulator.input_registers()[:2]
+    assert data[DEVICE_TYPE] == 2601
+
+
+async def test_probe_input_ranges(socket_enabled):
+    """Test that probing finds the registers served by older firmware."""
+    async with DachsSimulator(Scenario(input_register_count=46)) as simulator:
+        api = DachsModbusApiClient("127.0.0.1", simulator.port, MOCK_GLT_PIN)
+        ranges = await api.probe_input_ranges()
+        api.set_supported_keys(keys_in_ranges(ranges))
+        fast = await api.get_tier_data(TIER_FAST)
+        api.close()
+
+    assert ranges == [(0, 46)]
+    assert CURRENT_DISCHARGE_POWER not in keys_in_ranges(ranges)
+    assert CURRENT_DISCHARGE_POWER not in fast
+    assert fast[UNIT_STATUS] == 2
+
+
+async def test_discovery(simulator):
+    """Test identifying and scanning for the simulated unit."""
+    identity = await async_identify("127.0.0.1", simulator.port, 1)
+    assert identity[SERIAL_NUMBER] == "5512345678"
+
+    found = await async_scan(IPv4Network("127.0.0.1/32"), simulator.port, 1)
+    assert list(found) == ["127.0.0.1"]
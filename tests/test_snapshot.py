@@ -0,0 +1,38 @@
+"""Unit tests for the Dachs Modbus poll snapshot."""
+
+import pytest
+
+from custom_components.dachs_modbus.const import (
+    CONTROL_STRATEGY,
+    ELECTRICAL_POWER,
+    OUTSIDE_TEMPERATURE,
+    UNIT_STATUS,
+)
+from custom_components.dachs_modbus.snapshot import DachsSnapshot, snapshot_accessor
+
+
+def test_snapshot_values():
+    """Test translation, missing values and mapping access."""
+    snapshot = DachsSnapshot(
+        {UNIT_STATUS: 2, CONTROL_STRATEGY: 9, ELECTRICAL_POWER: 5.5, "other": 1}
+    )
+
+    assert snapshot[UNIT_STATUS] == "Running"
+    assert snapshot[CONTROL_STRATEGY] is None
+    assert snapshot.get(OUTSIDE_TEMPERATURE) is None
+    assert snapshot_accessor(ELECTRICAL_POWER)(snapshot) == 5.5
+    assert "other" not in snapshot
+    with pytest.raises(KeyError):
+        snapshot["other"]
+
+
+def test_snapshot_is_immutable():
+    """Test that a snapshot cannot be changed."""
+    snapshot = DachsSnapshot({ELECTRICAL_POWER: 5.5})
+
+    with pytest.raises(AttributeError):
+        snapshot.electrical_power = 1.0
+    with pytest.raises(TypeError):
+        snapshot[ELECTRICAL_POWER] = 1.0
+    assert snapshot == DachsSnapshot({ELECTRICAL_POWER: 5.5})
+    assert snapshot != DachsSnapshot({ELECTRICAL_POWER: 5.6})
@@ -0,0 +1,36 @@
+"""Tests of the Dachs Modbus switch entities."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymodbus.exceptions import ModbusIOException
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.dachs_modbus.const import BLOCK_CHP_VIA_GLT
+from custom_components.dachs_modbus.coordinator import DachsModbusDataUpdateCoordinator
+from custom_components.dachs_modbus.switch import SWITCH_TYPES, DachsModbusSwitch
+
+MOCK_ENTRY_ID = "switch_entry_1"
+
+
+async def test_block_read_back_fails(hass: HomeAssistant):
+    """Test that a failed read-back is not reported as a failed write."""
+    coordinator = MagicMock(spec=DachsModbusDataUpdateCoordinator)
+    coordinator.hass = hass
+    coordinator.api = MagicMock()
+    coordinator.api.set_block_chp = AsyncMock()
+    coordinator.async_refresh_controls.side_effect = ModbusIOException("timeout")
+    entry = MagicMock(spec=ConfigEntry)
+    entry.entry_id = MOCK_ENTRY_ID
+    coordinator.last_update_success = True
+    coordinator.data = {BLOCK_CHP_VIA_GLT: 0}
+    switch = DachsModbusSwitch(coordinator, SWITCH_TYPES[0], entry)
+    switch.hass = hass
+    switch.entity_id = "switch.dachs_block_chp_via_glt"
+
+    with pytest.raises(HomeAssistantError, match="failed to read it back"):
+        await switch.async_turn_on()
+    coordinator.api.set_block_chp.assert_awaited_once_with(True)